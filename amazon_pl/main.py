@@ -3,19 +3,31 @@
 功能：整合所有模块，实现完整的分析流程
 """
 import argparse
+import atexit
+import contextlib
 import logging
+import multiprocessing
+import os
+import queue
 import yaml
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache, partial
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
+
+import pandas as pd
 
 # 修改导入语句
 from src.utils.sentiment_analyzer import SentimentAnalyzer, SentimentAnalysisError
 from src.data_processor import DataProcessor, DataProcessingError
 from src.utils.insight_generator import InsightGenerator
 from src.report_generator import ReportGenerator
-from src.analyzers.base_analyzer import ProcessingError
+from src.analyzers.base_analyzer import ProcessingError, extract_categories_shared
+from src.analyzers._spacy_cache import gpu_requested
 from src.analyzers.user_analyzer import UserAnalyzer
 from src.analyzers.timing_analyzer import TimingAnalyzer
 from src.analyzers.location_analyzer import LocationAnalyzer
@@ -26,23 +38,248 @@ from src.analyzers.experience_analyzer import ExperienceAnalyzer
 from src.analyzers.design_expectation_analyzer import DesignExpectationAnalyzer
 
 
+# 优先使用 libyaml 的 C 实现解析配置
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 分析器注册表 {分析器名称: 分析器类}
+ANALYZER_REGISTRY = {
+    'user_analysis': UserAnalyzer,
+    'timing_analysis': TimingAnalyzer,
+    'location_analysis': LocationAnalyzer,
+    'purpose_analysis': PurposeAnalyzer,
+    'scenario_analysis': ScenarioAnalyzer,
+    'motivation_analysis': MotivationAnalyzer,
+    'experience_analysis': ExperienceAnalyzer,
+    'design_analysis': DesignExpectationAnalyzer
+}
+
+
+# 日志格式：使用原始时间戳代替 asctime，避免每条记录都做 strftime
+LOG_FORMAT = '%(created).3f - %(name)s - %(levelname)s - %(message)s'
+
+
+def _queue_handler(log_queue) -> QueueHandler:
+    """
+    创建只入队的日志处理器
+
+    入队前只合并消息参数（%(message)s），时间戳、级别等完整格式由监听线程的处理器添加，
+    避免默认格式在入队时和输出时各套用一次
+
+    参数:
+        log_queue: 日志队列
+    返回:
+        QueueHandler: 日志队列处理器
+    """
+    handler = QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
+
+def _setup_logging() -> Optional[QueueListener]:
+    """
+    设置日志配置（每个进程只执行一次），日志记录经队列交由后台线程格式化并输出
+
+    返回:
+        Optional[QueueListener]: 新启动的日志监听器，已配置过时返回 None
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+
+    log_dir = Path('logs')
+    log_dir.mkdir(exist_ok=True)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        RotatingFileHandler(
+            log_dir / 'analysis.log',
+            maxBytes=50_000_000,
+            backupCount=5,
+            encoding='utf-8'
+        ),
+        logging.StreamHandler(sys.stdout)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # 调用线程只负责入队，格式化和写出都在监听线程中完成
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.addHandler(_queue_handler(log_queue))
+    root.setLevel(logging.INFO)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # 日志输出失败时不打印异常栈；格式中不使用文件名/行号，跳过调用位置查找
+    logging.raiseExceptions = False
+    logging._srcfile = None
+    return listener
+
+
+def _init_worker_logging(log_queue) -> None:
+    """
+    子进程初始化：日志记录全部经跨进程队列交给主进程的监听器输出
+
+    参数:
+        log_queue: 主进程创建的 multiprocessing 队列
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler(log_queue))
+    root.setLevel(logging.INFO)
+
+
+@contextlib.contextmanager
+def _worker_log_queue(ctx):
+    """
+    创建供子进程写入日志的跨进程队列，并在主进程中启动监听器转交给根日志处理器
+
+    参数:
+        ctx: multiprocessing 上下文
+    返回:
+        Iterator: 跨进程日志队列（退出时停止监听器并输出剩余记录）
+    """
+    log_queue = ctx.Queue(-1)
+    listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+    try:
+        yield log_queue
+    finally:
+        listener.stop()
+
+
+@lru_cache(maxsize=8)
+def _load_cfg(path: str, mtime: float) -> Dict[str, Any]:
+    """
+    解析配置文件，按 (路径, 修改时间) 缓存，文件修改后自动失效
+
+    参数:
+        path: 配置文件路径
+        mtime: 配置文件修改时间
+    返回:
+        Dict: 配置信息（共享对象，请勿修改）
+    """
+    with open(path, 'rb') as f:
+        return yaml.load(f.read(), Loader=_YAML_LOADER) or {}
+
+
+@lru_cache(maxsize=None)
+def _get_analyzer(name: str):
+    """
+    获取指定名称的分析器实例，每个进程内只构建一次
+
+    参数:
+        name: 分析器名称
+    返回:
+        BaseAnalyzer: 分析器实例
+    """
+    return ANALYZER_REGISTRY[name]()
+
+
+@lru_cache(maxsize=1)
+def _build_analyzers() -> Mapping[str, Any]:
+    """
+    构建全部分析器，返回只读映射，在多个 ReviewAnalyzer 实例间共享
+
+    返回:
+        Mapping[str, Any]: {分析器名称: 分析器实例}
+    """
+    return MappingProxyType({name: _get_analyzer(name) for name in ANALYZER_REGISTRY})
+
+
+def _run_analyzer(name: str, df, categories: Dict[str, Any] = None):
+    """
+    在子进程中执行单个分析器
+
+    参数:
+        name: 分析器名称
+        df: 处理后的评论数据DataFrame
+        categories: 已由共用解析提取好的类别（可选）
+    返回:
+        Dict: 分析结果
+    """
+    # 分析器持有 spaCy 模型等重量级资源，只传递名称，由子进程内的缓存提供实例
+    return _get_analyzer(name).analyze(df, categories=categories)
+
+
+def _extract_group_categories(names: Tuple[str, ...], df) -> Dict[str, Any]:
+    """
+    一组逐 Doc 提取类别的分析器共用一次 spaCy 解析，提取各自的类别
+
+    参数:
+        names: 分析器名称
+        df: 处理后的评论数据DataFrame（包含组内各分析器需要的列）
+    返回:
+        Dict[str, Any]: {分析器名称: 类别}；已有缓存结果或提取失败的分析器不在其中
+    """
+    analyzers = {name: _get_analyzer(name) for name in names}
+
+    # 已有缓存结果的分析器不需要解析
+    pending = {name: analyzer for name, analyzer in analyzers.items() if analyzer.cached_result(df) is None}
+    if len(pending) < 2:
+        return {}
+    return extract_categories_shared(pending, df)
+
+
+def _run_analyzer_group(names: Tuple[str, ...], df) -> Dict[str, Any]:
+    """
+    在同一进程中执行一组逐 Doc 提取类别的分析器，评论只经 spaCy 解析一次
+
+    参数:
+        names: 分析器名称
+        df: 处理后的评论数据DataFrame（包含组内各分析器需要的列）
+    返回:
+        Dict[str, Any]: {分析器名称: 分析结果}，失败的分析器结果为 None
+    """
+    try:
+        categories = _extract_group_categories(names, df)
+    except Exception as e:
+        logging.getLogger(__name__).error("Shared parsing failed: %s", e)
+        categories = {}
+
+    return {
+        name: _safe(name, partial(_get_analyzer(name).analyze, categories=categories.get(name)), df)
+        for name in names
+    }
+
+
+def _safe(name: str, func, df):
+    """
+    执行单个分析器，出错时记录日志并返回 None
+
+    参数:
+        name: 分析器名称
+        func: 分析函数
+        df: 处理后的评论数据DataFrame
+    返回:
+        Dict: 分析结果，失败时为 None
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        logger.info("开始 %s 分析...", name)
+        results = func(df)
+        logger.info("%s 分析完成，结果大小: %d", name, len(results) if results else 0)
+        return results
+    except Exception as e:
+        logger.error("Error in %s analysis: %s", name, e)
+        return None
+
+
 class ReviewAnalyzer:
     def __init__(self, config_path: str = 'config.yaml'):
         """初始化评论分析器"""
+        _setup_logging()
         self.logger = logging.getLogger(__name__)
         self.logger.info("Starting ReviewAnalyzer initialization...")
 
-        # 确保只初始化一次
         self._initialized = False
-        if self._initialized:
-            return
 
         try:
             # 加载配置
             self.logger.info("Loading configuration...")
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f)
-            self.logger.info("Configuration loaded from config.yaml")
+            self.config = _load_cfg(config_path, os.path.getmtime(config_path))
+            self.logger.info(f"Configuration loaded from {config_path}")
 
             # 初始化组件（使用单例模式或确保只初始化一次）
             self.logger.info("Initializing data processor...")
@@ -68,24 +305,15 @@ class ReviewAnalyzer:
 
         logging.info("ReviewAnalyzer initialization completed successfully")
 
-    def _initialize_analyzers(self) -> Dict[str, Any]:
+    def _initialize_analyzers(self) -> Mapping[str, Any]:
         """
-        初始化所有分析器
+        初始化所有分析器（进程内缓存，重复实例化时直接复用）
 
         返回:
-            Dict[str, Any]: 分析器字典 {分析器名称: 分析器实例}
+            Mapping[str, Any]: 分析器字典 {分析器名称: 分析器实例}
         """
         try:
-            analyzers = {
-                'user_analysis': UserAnalyzer(),
-                'timing_analysis': TimingAnalyzer(),
-                'location_analysis': LocationAnalyzer(),
-                'purpose_analysis': PurposeAnalyzer(),
-                'scenario_analysis': ScenarioAnalyzer(),
-                'motivation_analysis': MotivationAnalyzer(),
-                'experience_analysis': ExperienceAnalyzer(),
-                'design_analysis': DesignExpectationAnalyzer()
-            }
+            analyzers = _build_analyzers()
 
             self.logger.info("All analyzers initialized successfully")
             return analyzers
@@ -94,23 +322,6 @@ class ReviewAnalyzer:
             self.logger.error(f"Error initializing analyzers: {str(e)}")
             raise
 
-    def _setup_logging(self):
-        """设置日志配置"""
-        log_dir = Path('logs')
-        log_dir.mkdir(exist_ok=True)
-
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = log_dir / f'analysis_{timestamp}.log'
-
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """
         加载配置文件
@@ -121,62 +332,166 @@ class ReviewAnalyzer:
             Dict: 配置信息
         """
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = _load_cfg(config_path, os.path.getmtime(config_path))
             logging.info(f"Configuration loaded from {config_path}")
             return config
         except Exception as e:
             logging.error(f"Error loading config: {str(e)}")
             return {}
 
-    def analyze(self, input_file: str, output_name: str = None) -> str:
+    @contextlib.contextmanager
+    def _stage(self, name: str):
+        """
+        记录流程阶段的耗时
+
+        参数:
+            name: 阶段名称
+        """
+        self.logger.info("=== %s ===", name)
+        start = time.perf_counter()
+        yield
+        self.logger.info("%s 耗时 %.3fs", name, time.perf_counter() - start)
+
+    def _run_analyzers(self, processed_df) -> Dict[str, Any]:
+        """
+        执行各维度分析，各分析器相互独立，使用多进程并行执行
+
+        参数:
+            processed_df: 处理后的评论数据DataFrame
+        返回:
+            Dict[str, Any]: {分析器名称: 分析结果}
+        """
+        # 逐 Doc 提取类别的分析器合并为一个任务，共用一次 spaCy 解析
+        doc_group = tuple(name for name, analyzer in self.analyzers.items() if analyzer.supports_doc_extraction)
+        if len(doc_group) < 2:
+            doc_group = ()
+        tasks = [name for name in self.analyzers if name not in doc_group]
+
+        max_workers = self.config.get('analysis', {}).get('max_workers') or len(self.analyzers)
+        max_workers = min(max_workers, len(tasks) + bool(doc_group))
+        if gpu_requested():
+            # 主进程已初始化 GPU，子进程需各自重新初始化并加载模型，改为顺序执行
+            max_workers = 1
+
+        # 每个分析器只接收其需要的列，减少扫描和跨进程传输的数据量
+        col_views = {}
+        for name in tasks:
+            columns = [c for c in self.analyzers[name].required_columns if c in processed_df.columns]
+            col_views[name] = processed_df[columns]
+        if doc_group:
+            columns = list(dict.fromkeys(
+                c for name in doc_group
+                for c in self.analyzers[name].required_columns if c in processed_df.columns
+            ))
+            group_view = processed_df[columns]
+
+        analysis_results = {}
+        if max_workers <= 1:
+            # 单进程时按顺序执行，失败的分析器不计入结果
+            if doc_group:
+                analysis_results.update(_run_analyzer_group(doc_group, group_view))
+            for name in tasks:
+                analysis_results[name] = _safe(name, self.analyzers[name].analyze, col_views[name])
+        else:
+            # 使用 spawn 启动子进程：fork 会继承主进程的日志队列（子进程中无人读取）和其他线程持有的锁；
+            # 子进程的日志经跨进程队列交回主进程输出
+            ctx = multiprocessing.get_context('spawn')
+            with _worker_log_queue(ctx) as log_queue, ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=ctx,
+                    initializer=_init_worker_logging,
+                    initargs=(log_queue,)
+            ) as executor:
+                # 共用解析只在一个进程中提取类别，其后各分析器的统计、情感和趋势分析仍并行执行
+                futures = {}
+                if doc_group:
+                    self.logger.info("开始 %s 的共用解析...", ', '.join(doc_group))
+                    futures[executor.submit(_extract_group_categories, doc_group, group_view)] = doc_group
+                for name in tasks:
+                    self.logger.info("开始 %s 分析...", name)
+                    futures[executor.submit(_run_analyzer, name, col_views[name])] = name
+
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = futures.pop(future)
+                        try:
+                            results = future.result()
+                        except Exception as e:
+                            self.logger.error("Error in %s analysis: %s", name, e)
+                            results = {} if name is doc_group else None
+
+                        if name is doc_group:
+                            # 共用解析失败或已有缓存的分析器不带类别，由其自行提取或读取缓存
+                            for member in doc_group:
+                                self.logger.info("开始 %s 分析...", member)
+                                futures[executor.submit(
+                                    _run_analyzer, member, group_view, results.get(member)
+                                )] = member
+                            continue
+
+                        if results is not None:
+                            analysis_results[name] = results
+                            self.logger.info("%s 分析完成，结果大小: %d", name, len(results) if results else 0)
+
+        # 保持与分析器注册顺序一致，失败的分析器不计入结果
+        return {
+            name: analysis_results[name]
+            for name in self.analyzers
+            if analysis_results.get(name) is not None
+        }
+
+    def analyze(self, input_file: str, output_name: str = None, nrows: int = None) -> str:
         """
         执行完整的分析流程
+
+        参数:
+            input_file: 输入数据文件路径
+            output_name: 输出报告文件名（可选）
+            nrows: 要读取的行数（可选，用于测试）
+        返回:
+            str: 报告文件路径
         """
         try:
-            # 1. 加载和预处理数据
-            print("\n=== 数据加载阶段 ===")
-            df = self.data_processor.load_data(input_file, nrows=100)
-            print(f"加载数据形状: {df.shape}")
-            print(f"数据列: {df.columns.tolist()}")
+            # 1. 分块加载和预处理数据，原始数据块处理完即释放
+            with self._stage("数据加载与处理阶段"):
+                chunksize = self.config.get('data_processing', {}).get('chunksize', 50_000)
+                processed_chunks = []
+                for df in self.data_processor.iter_data(input_file, chunksize=chunksize, nrows=nrows):
+                    self.logger.info("加载数据块形状: %s", df.shape)
+                    processed_chunks.append(self.data_processor.process_dataframe(df))
+
+                if not processed_chunks:
+                    raise DataProcessingError("No data loaded from input file")
 
-            print("\n=== 数据处理阶段 ===")
-            processed_df = self.data_processor.process_dataframe(df)
-            print(f"处理后数据形状: {processed_df.shape}")
+                processed_df = pd.concat(processed_chunks, ignore_index=True)
+                self.logger.info("数据列: %s", processed_df.columns.tolist())
+                self.logger.info("处理后数据形状: %s", processed_df.shape)
 
             # 2. 执行各维度分析
-            print("\n=== 维度分析阶段 ===")
-            analysis_results = {}
-            for name, analyzer in self.analyzers.items():
-                try:
-                    print(f"\n开始 {name} 分析...")
-                    results = analyzer.analyze(processed_df)
-                    analysis_results[name] = results
-                    print(f"{name} 分析完成，结果大小: {len(results) if results else 0}")
-                except Exception as e:
-                    print(f"Error in {name} analysis: {str(e)}")
-                    continue
+            with self._stage("维度分析阶段"):
+                analysis_results = self._run_analyzers(processed_df)
 
             # 3. 生成洞察
-            print("\n=== 洞察生成阶段 ===")
-            insights = self.insight_generator.generate_comprehensive_insights(
-                analysis_results
-            )
-            print(f"生成洞察数量: {len(insights) if insights else 0}")
+            with self._stage("洞察生成阶段"):
+                insights = self.insight_generator.generate_comprehensive_insights(
+                    analysis_results
+                )
+                self.logger.info("生成洞察数量: %d", len(insights) if insights else 0)
 
             # 4. 生成报告
-            print("\n=== 报告生成阶段 ===")
-            report_path = self.report_generator.generate_report(
-                analysis_results,
-                insights,
-                output_name
-            )
-            print(f"报告已生成: {report_path}")
+            with self._stage("报告生成阶段"):
+                report_path = self.report_generator.generate_report(
+                    analysis_results,
+                    insights,
+                    output_name
+                )
+                self.logger.info("报告已生成: %s", report_path)
 
             return report_path
 
         except Exception as e:
-            print(f"\nError in analysis process: {str(e)}")
+            self.logger.error("Error in analysis process: %s", e)
             raise
 def main():
     """主函数"""
@@ -193,6 +508,12 @@ def main():
         help='Path to the configuration file',
         default='config.yaml'
     )
+    parser.add_argument(
+        '--nrows',
+        help='Number of rows to read from the input file (for testing)',
+        type=int,
+        default=None
+    )
 
     args = parser.parse_args()
 
@@ -201,7 +522,7 @@ def main():
         analyzer = ReviewAnalyzer(args.config)
 
         # 执行分析
-        report_path = analyzer.analyze(args.input_file, args.output)
+        report_path = analyzer.analyze(args.input_file, args.output, args.nrows)
 
         print(f"\nAnalysis completed successfully!")
         print(f"Report saved to: {report_path}")
@@ -212,10 +533,10 @@ def main():
 
 
 if __name__ == '__main__':
-    # 添加NLTK资源初始化，包含重试机制
-    from src.utils.nltk_initializer import initialize_nltk_resources
+    # 在后台初始化NLTK资源（包含重试机制），与配置加载和组件初始化并行
+    from src.utils.nltk_initializer import start_nltk_initialization
 
-    initialize_nltk_resources(max_retries=3, retry_delay=2)
+    start_nltk_initialization(max_retries=3, retry_delay=2)
 
     # 执行主程序
     main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+spaCy 模型缓存
+功能：按 (模型名称, 禁用组件) 在进程内缓存已加载的模型，供各分析器共享
+"""
+import logging
+import os
+import subprocess
+import sys
+from functools import lru_cache
+from typing import Tuple
+
+import spacy
+
+logger = logging.getLogger(__name__)
+
+
+def gpu_requested() -> bool:
+    """
+    是否通过环境变量 SPACY_USE_GPU=1 请求在 GPU 上运行 spaCy（不初始化 GPU）
+
+    返回:
+        bool: 是否请求使用 GPU
+    """
+    return os.getenv('SPACY_USE_GPU', '0') == '1'
+
+
+@lru_cache(maxsize=None)
+def use_gpu() -> bool:
+    """
+    按请求在 GPU 上运行 spaCy，每个进程只检查一次；未安装 CuPy 或没有可用设备时使用 CPU
+
+    返回:
+        bool: 是否已启用 GPU
+    """
+    if not gpu_requested():
+        return False
+
+    try:
+        enabled = spacy.prefer_gpu()
+    except Exception as e:
+        logger.warning(f"Failed to enable GPU for spaCy: {str(e)}")
+        return False
+
+    if not enabled:
+        logger.warning("SPACY_USE_GPU is set but no GPU is available, using CPU")
+    return enabled
+
+
+@lru_cache(maxsize=4)
+def load_nlp(name: str = 'en_core_web_sm', disable: Tuple[str, ...] = ()):
+    """
+    加载 spaCy 模型，相同参数在同一进程内只加载一次
+
+    参数:
+        name: 模型名称
+        disable: 要禁用的管道组件（需为元组以便缓存）
+    返回:
+        Language: spaCy 模型（共享对象，请勿修改其管道）
+    """
+    # 必须在加载模型之前选择设备
+    use_gpu()
+
+    try:
+        return spacy.load(name, disable=list(disable))
+    except OSError:
+        # 模型未安装时用当前解释器下载一次，不经过 shell
+        _download_model(name)
+        return spacy.load(name, disable=list(disable))
+
+
+@lru_cache(maxsize=None)
+def _download_model(name: str):
+    """
+    下载 spaCy 模型，同一进程内每个模型最多下载一次
+
+    参数:
+        name: 模型名称
+    """
+    logger.warning(f"Downloading spaCy model {name}...")
+    subprocess.run([sys.executable, '-m', 'spacy', 'download', name], check=True)
@@ -3,20 +3,37 @@
 功能：定义所有维度共用的基础分析功能，包括趋势分析和交叉分析
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List, Set, Optional, Tuple
+from typing import Dict, FrozenSet, Iterator, List, Set, Optional, Tuple
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import logging
+import multiprocessing
 import os
+from logging.handlers import RotatingFileHandler
 from ..utils.text_processor import TextProcessor
 from ..utils.sentiment_analyzer import SentimentAnalyzer
 from ..utils.insight_generator import InsightGenerator
-import spacy
+from ..utils.nltk_initializer import ensure_nltk_resources, wait_for_nltk_resources
+from ._spacy_cache import gpu_requested, load_nlp, use_gpu
 import hashlib
 import json
-from functools import lru_cache
+import mmap
+import pickle
+import re
+from functools import cached_property, lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick 为可选依赖，未安装时按类别使用正则匹配
+    ahocorasick = None
+
 # 确保日志和缓存目录存在
 os.makedirs('logs', exist_ok=True)
 os.makedirs('cache', exist_ok=True)
@@ -37,7 +54,129 @@ class ResourceError(AnalysisError):
     """资源相关异常"""
     pass
 
+class _CacheJSONEncoder(json.JSONEncoder):
+    """缓存结果的 JSON 编码器，将 datetime 编码为 ISO 格式字符串"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+def _load_json_file(path: Path):
+    """
+    通过内存映射读取 JSON 文件，安装了 orjson 时直接在映射内存上解析
+
+    参数:
+        path: JSON 文件路径
+    返回:
+        解析后的对象
+    """
+    with path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if orjson is not None:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+        return json.loads(mm[:])
+
+def _keyword_variants(keyword: str) -> Set[str]:
+    """
+    关键词及其常见复数形式（-s、-es、-y→-ies），保持原先按词形还原匹配时对复数的覆盖
+
+    参数:
+        keyword: 关键词（小写）
+    返回:
+        Set[str]: 关键词本身及其复数形式
+    """
+    variants = {keyword, keyword + 's', keyword + 'es'}
+    if len(keyword) > 1 and keyword.endswith('y') and keyword[-2] not in 'aeiou':
+        variants.add(keyword[:-1] + 'ies')
+    return variants
+
+@lru_cache(maxsize=256)
+def _compile_keyword_pattern(keywords: frozenset) -> re.Pattern:
+    """
+    将关键词集合（含复数形式）编译为单个按词边界匹配的正则表达式（按关键词集合缓存）
+
+    参数:
+        keywords: 关键词集合
+    返回:
+        re.Pattern: 忽略大小写的正则表达式
+    """
+    variants = {variant for k in keywords for variant in _keyword_variants(k.lower())}
+    # 长关键词优先，避免被其前缀短词抢先匹配
+    alternation = '|'.join(
+        re.escape(k) for k in sorted(variants, key=len, reverse=True)
+    )
+    return re.compile(r'\b(?:' + alternation + r')\b', re.IGNORECASE)
+
+def summarize_polarity(scores) -> Dict:
+    """
+    汇总情感极性分数（向量化计算均值及正/负/中性数量）
+
+    参数:
+        scores: 情感极性分数序列
+    返回:
+        Dict: {'mean': 均值, 'positive': 正面数, 'negative': 负面数, 'neutral': 中性数}
+    """
+    values = np.asarray(scores, dtype=np.float64)
+    if values.size == 0:
+        return {'mean': 0.0, 'positive': 0, 'negative': 0, 'neutral': 0}
+
+    # sign 取值 -1/0/1，偏移后一次 bincount 得到三类计数
+    counts = np.bincount(np.sign(values).astype(np.int64) + 1, minlength=3)
+    return {
+        'mean': float(values.mean()),
+        'positive': int(counts[2]),
+        'negative': int(counts[0]),
+        'neutral': int(counts[1])
+    }
+
+def extract_categories_shared(
+        analyzers: Dict[str, 'BaseAnalyzer'],
+        df: pd.DataFrame
+) -> Dict[str, Dict[str, Set[str]]]:
+    """
+    多个逐 Doc 提取类别的分析器共用一次 spaCy 解析，每个 Doc 依次交给各分析器处理
+
+    参数:
+        analyzers: {分析器名称: 分析器实例}（均需 supports_doc_extraction）
+        df: 评论数据DataFrame
+    返回:
+        Dict[str, Dict[str, Set[str]]]: {分析器名称: {类别名称: {相关关键词集合}}}；
+            与第一个分析器使用不同 spaCy 模型或提取出错的分析器不在结果中，由其自行提取
+    """
+    if not analyzers:
+        return {}
+
+    first = next(iter(analyzers.values()))
+    active = {name: analyzer for name, analyzer in analyzers.items() if analyzer.nlp is first.nlp}
+    buckets = {name: analyzer._new_category_buckets() for name, analyzer in active.items()}
+
+    # 批量解析所有评论
+    for doc in first._pipe_reviews(df):
+        for name, analyzer in list(active.items()):
+            try:
+                analyzer._extract_from_doc(doc, buckets[name])
+            except Exception as e:
+                analyzer.logger.error(f"Shared category extraction failed: {str(e)}")
+                del active[name]
+
+    return {
+        name: analyzer._finalize_categories(buckets[name])
+        for name, analyzer in active.items()
+    }
+
+
 class BaseAnalyzer(ABC):
+    # 分析器实际读取的数据列，调度时只向分析器传递这些列
+    required_columns: Tuple[str, ...] = ('评论人', '标题', '内容', '评论时间', '情感分数')
+
+    # 是否实现了逐 Doc 提取类别（_category_labels / _extract_from_doc），
+    # 实现了的分析器可通过 extract_categories_shared 共用一次 spaCy 解析
+    supports_doc_extraction = False
+
+    # 类别至少需要的不同短语数，少于此数的类别被过滤掉
+    min_mentions = 2
+
     def __init__(self):
         """初始化基础分析器"""
         try:
@@ -45,44 +184,25 @@ class BaseAnalyzer(ABC):
             self._setup_logging()
             self.logger.info("Initializing base analyzer...")
 
-            # 初始化 NLTK 数据
-            self.logger.info("Checking NLTK resources...")
-            import nltk
-            required_nltk_data = [
-                'punkt',
-                'stopwords',
-                'wordnet',
-                'averaged_perceptron_tagger'
-            ]
-
-            for item in required_nltk_data:
-                try:
-                    nltk.data.find(f'tokenizers/{item}')
-                except LookupError:
-                    self.logger.info(f"Downloading {item}...")
-                    nltk.download(item, quiet=True)
-
-            # 初始化工具类
-            self.logger.info("Initializing utility classes...")
-            self.text_processor = TextProcessor()
-            self.sentiment_analyzer = SentimentAnalyzer()
-            self.insight_generator = InsightGenerator()
-
-            # 初始化 spaCy
-            self.logger.info("Initializing spaCy...")
-            try:
-                import spacy
-                self.nlp = spacy.load('en_core_web_sm')
-            except OSError:
-                self.logger.warning("Downloading spaCy model...")
-                import os
-                os.system('python -m spacy download en_core_web_sm')
-                self.nlp = spacy.load('en_core_web_sm')
+            # NLTK 资源、工具类和 spaCy 模型在首次使用时才加载（见下方的属性）
+
+            # spaCy 批处理设置
+            # GPU 上的批量越大吞吐越高
+            self.nlp_batch_size = int(os.getenv('SPACY_BATCH_SIZE', '512' if gpu_requested() else '128'))
+            self.nlp_n_process = 1  # 多进程在部分平台上反而更慢，默认单进程
+            self.nlp_multiprocess_threshold = 2000  # 文本数达到该值时自动启用多进程
 
             # 缓存设置
             self.cache_dir = Path('cache')
             self.cache_enabled = True
             self.cache_ttl = 3600  # 缓存有效期（秒）
+            self.cache_format = 'pickle'  # 缓存格式：'pickle'（默认）或 'json'
+            self.cache_key_sample_size = 10_000  # 生成缓存键时最多参与哈希的行数
+
+            # 最近一次分析输入的内容指纹和结果（内存缓存）
+            self._last_fingerprint = None
+            self._last_cache_key = None
+            self._last_result = None
 
             # 存储分析结果
             self.categories = {}
@@ -101,6 +221,47 @@ class BaseAnalyzer(ABC):
             self.logger.error(f"Error initializing analyzer: {str(e)}")
             raise ResourceError(f"Failed to initialize analyzer: {str(e)}")
 
+    def _ensure_nltk(self):
+        """确保 NLTK 资源可用（等待后台初始化完成并检查缺失资源）"""
+        self.logger.info("Checking NLTK resources...")
+        wait_for_nltk_resources()
+        ensure_nltk_resources()
+
+    @cached_property
+    def text_processor(self) -> TextProcessor:
+        """文本处理工具（首次访问时创建）"""
+        self._ensure_nltk()
+        return TextProcessor()
+
+    @cached_property
+    def sentiment_analyzer(self) -> SentimentAnalyzer:
+        """情感分析工具（首次访问时创建）"""
+        self._ensure_nltk()
+        return SentimentAnalyzer()
+
+    @cached_property
+    def insight_generator(self) -> InsightGenerator:
+        """洞察生成工具（首次访问时创建）"""
+        return InsightGenerator()
+
+    @cached_property
+    def nlp(self):
+        """spaCy 模型（首次访问时加载）"""
+        self.logger.info("Initializing spaCy...")
+        # 各分析器只用到分词、词性、依存和词形还原，不加载实体识别组件
+        return load_nlp('en_core_web_sm', disable=('ner',))
+
+    @cached_property
+    def _pre_modifier_deps(self) -> FrozenSet[int]:
+        """
+        前置修饰语（amod、compound）依存关系的整数 ID，与 Token.dep 直接比较
+
+        compound 不在 spacy.symbols 中，Token.dep 取的是它在 StringStore 中的哈希值，
+        因此统一经 StringStore 解析，而不是从 spacy.symbols 导入
+        """
+        strings = self.nlp.vocab.strings
+        return frozenset({strings['amod'], strings['compound']})
+
     def _setup_logging(self):
         """设置日志"""
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -108,19 +269,176 @@ class BaseAnalyzer(ABC):
             # 控制台处理器
             console_handler = logging.StreamHandler()
             formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+                '%(created).3f - %(name)s - %(levelname)s - %(message)s'
             )
             console_handler.setFormatter(formatter)
             self.logger.addHandler(console_handler)
 
             # 文件处理器
-            file_handler = logging.FileHandler(
-                f'logs/{self.__class__.__name__}.log'
+            file_handler = RotatingFileHandler(
+                f'logs/{self.__class__.__name__}.log',
+                maxBytes=50_000_000,
+                backupCount=5,
+                encoding='utf-8'
             )
             file_handler.setFormatter(formatter)
             self.logger.addHandler(file_handler)
 
             self.logger.setLevel(logging.INFO)
+            # 已有独立的处理器，不再向根日志器传播，避免重复输出
+            self.logger.propagate = False
+
+    def _review_texts(self, df: pd.DataFrame) -> pd.Series:
+        """
+        向量化拼接每条评论的标题和内容
+
+        参数:
+            df: 评论数据DataFrame
+        返回:
+            pd.Series: "标题 内容" 文本序列（缺失值按空字符串处理）
+        """
+        titles = df['标题'].fillna('').astype(str) if '标题' in df.columns else ''
+        return titles + ' ' + df['内容'].fillna('').astype(str)
+
+    def _iter_review_texts(self, df: pd.DataFrame) -> Iterator[str]:
+        """
+        逐条生成小写的 "标题 内容" 文本，供 nlp.pipe 按批读取，不一次性构建全部拼接文本
+
+        参数:
+            df: 评论数据DataFrame
+        返回:
+            Iterator[str]: 与 _review_texts(df).str.lower() 内容一致的文本迭代器
+        """
+        contents = df['内容'].fillna('').astype(str).to_numpy()
+        if '标题' not in df.columns:
+            for content in contents:
+                yield f" {content}".lower()
+            return
+
+        titles = df['标题'].fillna('').astype(str).to_numpy()
+        for title, content in zip(titles, contents):
+            yield f"{title} {content}".lower()
+
+    def _pipe_reviews(self, df: pd.DataFrame) -> Iterator:
+        """
+        批量解析每条评论（小写的 "标题 内容"）
+
+        参数:
+            df: 评论数据DataFrame
+        返回:
+            Iterator[Doc]: 与 df 行顺序一致的 spaCy Doc 迭代器
+        """
+        return self._nlp_pipe(self._iter_review_texts(df), n_texts=len(df))
+
+    def _nlp_pipe(self, texts, batch_size: int = None, n_process: int = None, n_texts: int = None):
+        """
+        批量处理文本，代替逐条调用 self.nlp(text)
+
+        参数:
+            texts: 文本可迭代对象（可以是生成器，nlp.pipe 按批读取）
+            batch_size: 每批文本数（默认使用 self.nlp_batch_size）
+            n_process: 进程数（默认按数据量自动选择，见 _auto_n_process）
+            n_texts: 文本数量（texts 为生成器时用于选择进程数和批量大小）
+        返回:
+            Iterator[Doc]: 与输入顺序一致的 spaCy Doc 迭代器
+        """
+        if n_texts is None and hasattr(texts, '__len__'):
+            n_texts = len(texts)
+        if n_process is None:
+            n_process = self._auto_n_process(n_texts)
+        if batch_size is None:
+            batch_size = self.nlp_batch_size
+            if n_process > 1:
+                # 多进程时加大批量，保证每个进程都有足够的文本
+                batch_size = max(64, (n_texts or 0) // (n_process * 4))
+
+        return self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+
+    def _category_labels(self) -> List[str]:
+        """
+        逐 Doc 提取时的全部类别名称，列表序号即类别序号（supports_doc_extraction 的分析器需实现）
+
+        返回:
+            List[str]: 类别名称列表
+        """
+        raise NotImplementedError("Subclasses must implement _category_labels")
+
+    def _new_category_buckets(self) -> List[List[str]]:
+        """
+        创建逐 Doc 提取类别时使用的短语容器，按类别序号索引，提取过程中不拼接或拆分类别名称
+
+        同一短语在评论中反复出现，写入容器前应使用 sys.intern，列表中的重复短语共用同一个字符串对象
+
+        返回:
+            List[List[str]]: 每个类别序号对应一个短语列表
+        """
+        return [[] for _ in self._category_labels()]
+
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单个 Doc 中提取类别短语，写入 buckets（supports_doc_extraction 的分析器需实现）
+
+        参数:
+            doc: spaCy的Doc对象（由小写后的 "标题 内容" 解析得到）
+            buckets: 由 _new_category_buckets 创建的短语容器
+        """
+        raise NotImplementedError("Subclasses must implement _extract_from_doc")
+
+    def _finalize_categories(self, buckets: List[List[str]]) -> Dict[str, Set[str]]:
+        """
+        对各类别的短语去重，过滤掉提及次数过少的类别，并换回类别名称
+
+        参数:
+            buckets: 按类别序号索引的短语列表
+        返回:
+            Dict[str, Set[str]]: {类别名称: {相关关键词集合}}
+        """
+        categories = {}
+        for category, phrases in zip(self._category_labels(), buckets):
+            keywords = set(phrases)
+            if len(keywords) >= self.min_mentions:
+                categories[category] = keywords
+        return categories
+
+    def _extract_doc_categories(self, df: pd.DataFrame) -> Dict[str, Set[str]]:
+        """
+        单独解析评论并逐 Doc 提取类别（未与其他分析器共用解析时使用）
+
+        参数:
+            df: 评论数据DataFrame
+        返回:
+            Dict[str, Set[str]]: {类别名称: {相关关键词集合}}
+        """
+        buckets = self._new_category_buckets()
+
+        # 批量解析所有评论
+        for doc in self._pipe_reviews(df):
+            self._extract_from_doc(doc, buckets)
+
+        return self._finalize_categories(buckets)
+
+    def _auto_n_process(self, n_texts: Optional[int]) -> int:
+        """
+        根据文本数量选择 spaCy 的进程数
+
+        数据量达到阈值且当前不在分析器子进程中时使用多进程（分析器并行执行时各进程已占用 CPU）。
+        Windows 等使用 spawn 启动子进程的平台上，调用方必须位于 if __name__ == '__main__' 保护之下。
+
+        参数:
+            n_texts: 待处理文本数量（未知时为 None）
+        返回:
+            int: 进程数
+        """
+        if self.nlp_n_process != 1:
+            return self.nlp_n_process
+        if use_gpu():
+            # GPU 上运行时由单个进程独占设备
+            return 1
+        if n_texts is None or n_texts < self.nlp_multiprocess_threshold:
+            return 1
+        if multiprocessing.parent_process() is not None:
+            return 1
+        return max(1, min((os.cpu_count() or 1) - 1, 8))
 
     def _generate_cache_key(self, df: pd.DataFrame) -> str:
         """
@@ -132,30 +450,25 @@ class BaseAnalyzer(ABC):
             str: 缓存键
         """
         try:
-            # 使用更安全的方式生成缓存键
-            # 1. 获取DataFrame的基本信息
-            row_count = len(df)
-            col_count = len(df.columns)
-            column_names = '_'.join(df.columns)
-
-            # 2. 获取数据的简单统计信息
-            numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
-            stats = []
-            if not numeric_cols.empty:
-                stats = df[numeric_cols].mean().round(2).values.tolist()
-
-            # 3. 组合信息生成键
-            key_parts = [
-                self.__class__.__name__,
-                str(row_count),
-                str(col_count),
-                column_names,
-                '_'.join(map(str, stats))
-            ]
-
-            # 4. 生成哈希值
-            key_string = '_'.join(key_parts)
-            hash_object = hashlib.sha256(key_string.encode())
+            # 对数据内容本身做哈希，数据结构相同但内容不同时不会冲突
+            # 缓存键不需要密码学强度，使用更快的 BLAKE2b，16 字节摘要也缩短了文件名
+            hash_object = hashlib.blake2b(digest_size=16)
+            hash_object.update(self.__class__.__name__.encode())
+            hash_object.update(','.join(map(str, df.columns)).encode())
+            hash_object.update(str(df.shape).encode())
+
+            # 数据量很大时固定抽样，控制哈希开销
+            sample = df
+            if len(df) > self.cache_key_sample_size:
+                sample = df.sample(n=self.cache_key_sample_size, random_state=0)
+
+            try:
+                row_hashes = pd.util.hash_pandas_object(sample, index=False)
+            except TypeError:
+                # 含列表等不可哈希的单元格时，转为字符串后再哈希
+                row_hashes = pd.util.hash_pandas_object(sample.astype(str), index=False)
+            hash_object.update(row_hashes.values.tobytes())
+
             return hash_object.hexdigest()
 
         except Exception as e:
@@ -163,6 +476,18 @@ class BaseAnalyzer(ABC):
             # 如果生成缓存键失败，返回时间戳作为备用键
             return f"{self.__class__.__name__}_{datetime.now().timestamp()}"
 
+    def _cache_file(self, cache_key: str) -> Path:
+        """
+        获取缓存文件路径
+
+        参数:
+            cache_key: 缓存键
+        返回:
+            Path: 缓存文件路径（扩展名取决于缓存格式）
+        """
+        suffix = 'json' if self.cache_format == 'json' else 'pkl'
+        return self.cache_dir / f"{self.__class__.__name__}_{cache_key}.{suffix}"
+
     def _get_cached_result(self, cache_key: str) -> Optional[Dict]:
         """
         获取缓存的分析结果
@@ -175,7 +500,7 @@ class BaseAnalyzer(ABC):
         if not self.cache_enabled:
             return None
 
-        cache_file = self.cache_dir / f"{self.__class__.__name__}_{cache_key}.json"
+        cache_file = self._cache_file(cache_key)
 
         try:
             if cache_file.exists():
@@ -185,9 +510,11 @@ class BaseAnalyzer(ABC):
                     cache_file.unlink()
                     return None
 
-                with cache_file.open('r', encoding='utf-8') as f:
-                    self.logger.info("Using cached result")
-                    return json.load(f)
+                self.logger.info("Using cached result")
+                if self.cache_format == 'json':
+                    return _load_json_file(cache_file)
+                with cache_file.open('rb') as f:
+                    return pickle.load(f)
         except Exception as e:
             self.logger.warning(f"Error reading cache: {str(e)}")
             return None
@@ -205,30 +532,19 @@ class BaseAnalyzer(ABC):
         if not self.cache_enabled:
             return
 
-        cache_file = self.cache_dir / f"{self.__class__.__name__}_{cache_key}.json"
+        cache_file = self._cache_file(cache_key)
 
         try:
-            # 处理 datetime 对象
-            def process_dict(d: Dict) -> Dict:
-                processed = {}
-                for key, value in d.items():
-                    if isinstance(value, datetime):
-                        processed[key] = value.isoformat()
-                    elif isinstance(value, dict):
-                        processed[key] = process_dict(value)
-                    elif isinstance(value, list):
-                        processed[key] = [
-                            item.isoformat() if isinstance(item, datetime) else item
-                            for item in value
-                        ]
-                    else:
-                        processed[key] = value
-                return processed
-
-            processed_results = process_dict(results)
-
+            # pickle 原生支持 datetime 等对象，直接按二进制写入
+            if self.cache_format != 'json':
+                with cache_file.open('wb') as f:
+                    pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self.logger.info("Results saved to cache")
+                return
+
+            # JSON 格式：datetime 由编码器统一转换为 ISO 字符串
             with cache_file.open('w', encoding='utf-8') as f:
-                json.dump(processed_results, f, ensure_ascii=False, indent=2)
+                json.dump(results, f, cls=_CacheJSONEncoder, ensure_ascii=False)
             self.logger.info("Results saved to cache")
         except Exception as e:
             self.logger.warning(f"Error saving to cache: {str(e)}")
@@ -240,13 +556,79 @@ class BaseAnalyzer(ABC):
 
         try:
             current_time = datetime.now().timestamp()
-            for cache_file in self.cache_dir.glob(f"{self.__class__.__name__}_*.json"):
+            suffix = self._cache_file('*').suffix
+            for cache_file in self.cache_dir.glob(f"{self.__class__.__name__}_*{suffix}"):
                 if (current_time - cache_file.stat().st_mtime) > self.cache_ttl:
                     cache_file.unlink()
                     self.logger.info(f"Removed expired cache file: {cache_file.name}")
         except Exception as e:
             self.logger.warning(f"Error cleaning cache: {str(e)}")
 
+    def _input_fingerprint(self, df: pd.DataFrame) -> Tuple:
+        """
+        计算 DataFrame 中分析所用列的内容指纹
+
+        按内容而不是对象身份判断，原地修改或筛选同一个 DataFrame 后指纹随之改变
+
+        参数:
+            df: 评论数据DataFrame
+        返回:
+            Tuple: (形状, 列名, 所用列逐行哈希值之和)
+        """
+        data = df[[column for column in self.required_columns if column in df.columns]]
+        try:
+            row_hashes = pd.util.hash_pandas_object(data, index=True)
+        except TypeError:
+            # 含列表等不可哈希的单元格时，转为字符串后再哈希（与 _generate_cache_key 一致）
+            row_hashes = pd.util.hash_pandas_object(data.astype(str), index=True)
+        return df.shape, tuple(df.columns), int(row_hashes.sum())
+
+    def _remembered_result(self, fingerprint: Tuple) -> Optional[Dict]:
+        """
+        内容指纹与最近一次分析的输入一致时返回其结果
+
+        参数:
+            fingerprint: 由 _input_fingerprint 计算的内容指纹
+        返回:
+            Optional[Dict]: 最近一次的分析结果，不一致时返回 None
+        """
+        if self._last_result is not None and fingerprint == self._last_fingerprint:
+            return self._last_result
+        return None
+
+    def _remember_result(self, fingerprint: Tuple, cache_key: str, results: Dict) -> None:
+        """
+        在内存中记录最近一次分析输入的内容指纹和结果
+
+        参数:
+            fingerprint: 分析输入的内容指纹
+            cache_key: 缓存键
+            results: 分析结果
+        """
+        self._last_fingerprint = fingerprint
+        self._last_cache_key = cache_key
+        self._last_result = results
+
+    def cached_result(self, df: pd.DataFrame) -> Optional[Dict]:
+        """
+        查询 df 已有的分析结果（内存或磁盘缓存），命中时随后的 analyze(df) 直接复用
+
+        参数:
+            df: 评论数据DataFrame
+        返回:
+            Optional[Dict]: 已有的分析结果，没有时返回 None
+        """
+        fingerprint = self._input_fingerprint(df)
+        remembered = self._remembered_result(fingerprint)
+        if remembered is not None:
+            return remembered
+
+        cache_key = self._generate_cache_key(df)
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            self._remember_result(fingerprint, cache_key, cached)
+        return cached
+
     def _validate_data(self, df: pd.DataFrame) -> None:
         """验证输入数据的有效性"""
         if df is None or len(df) == 0:
@@ -263,12 +645,13 @@ class BaseAnalyzer(ABC):
         if null_counts.any():
             self.logger.warning(f"Found null values in columns: {null_counts[null_counts > 0]}")
 
-    def analyze(self, df: pd.DataFrame) -> Dict:
+    def analyze(self, df: pd.DataFrame, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         通用分析流程
 
         参数:
             df: 包含评论数据的DataFrame
+            categories: 已提取好的类别（可选，如由 extract_categories_shared 提供），提供时跳过类别提取
         返回:
             Dict: 分析结果
         """
@@ -276,9 +659,16 @@ class BaseAnalyzer(ABC):
             # 保存 df 作为实例属性
             self.df = df
 
-            # 数据验证
+            # 数据验证（先于计算指纹，无效输入统一报告为 DataValidationError）
             self._validate_data(df)
 
+            # 内容未变的数据再次传入时（如交叉分析），直接复用上一次的结果
+            fingerprint = self._input_fingerprint(df)
+            remembered = self._remembered_result(fingerprint)
+            if remembered is not None:
+                self.logger.info("Reusing in-memory analysis result")
+                return remembered
+
             # 清理旧缓存
             self._clean_old_cache()
 
@@ -287,15 +677,25 @@ class BaseAnalyzer(ABC):
             cached_result = self._get_cached_result(cache_key)
             if cached_result is not None:
                 self.logger.info("Using cached analysis result")
+                self._remember_result(fingerprint, cache_key, cached_result)
                 return cached_result
 
             self.analysis_metadata['start_time'] = datetime.now()
             self.analysis_metadata['total_samples'] = len(df)
 
+            # 取出（或在缺少情感分数列时计算）情感极性，供后续各步骤复用
+            self._polarity = self._compute_polarity(df)
+
+            # 评论内容到行位置的倒排索引，按示例取行时不必每个类别都扫描全表
+            self._content_index = df.groupby('内容', sort=False).indices
+
             # 1. 提取评论中的主要类别
             self.logger.info("Extracting categories...")
             try:
-                self.categories = self._extract_categories(df)
+                if categories is not None:
+                    self.categories = categories
+                else:
+                    self.categories = self._extract_categories(df)
             except Exception as e:
                 raise ProcessingError(f"Category extraction failed: {str(e)}")
 
@@ -353,6 +753,7 @@ class BaseAnalyzer(ABC):
 
             # 保存结果到缓存
             self._save_to_cache(cache_key, processed_results)
+            self._remember_result(fingerprint, cache_key, processed_results)
 
             return processed_results
 
@@ -384,55 +785,177 @@ class BaseAnalyzer(ABC):
         try:
             results = {}
             total_reviews = len(df)
+            if total_reviews == 0:
+                return results
 
-            for category, keywords in self.categories.items():
-                mentions = 0
-                examples = []
+            # 标题与内容合并后只构建一次，各类别在同一列上做向量化匹配
+            texts = self._review_texts(df)
 
-                for _, row in df.iterrows():
-                    try:
-                        text = f"{row['标题']} {row['内容']}"
-                        if self.text_processor.extract_keywords(text, keywords):
-                            mentions += 1
-                            if len(examples) < 3:  # 每个类别保存最多3个示例
-                                examples.append(text)
-                    except Exception as e:
-                        self.logger.warning(f"Error processing row: {str(e)}")
-                        continue
+            items = list(self.categories.items())
+            if ahocorasick is not None:
+                # 所有类别的关键词合并为一个自动机，每条文本只扫描一次
+                scanned = self._scan_categories_automaton(texts, items)
+            else:
+                scanned = [self._scan_category(texts, keywords) for _, keywords in items]
 
-                if mentions > 0:
-                    results[category] = {
-                        'mention_count': mentions,
-                        'percentage': (mentions / total_reviews) * 100,
-                        'examples': examples
-                    }
+            for (category, _), scan in zip(items, scanned):
+                if scan is None:
+                    continue
+
+                mentions, examples = scan
+                results[category] = {
+                    'mention_count': mentions,
+                    'percentage': (mentions / total_reviews) * 100,
+                    'examples': examples
+                }
 
             return results
         except Exception as e:
             raise ProcessingError(f"Error counting mentions: {str(e)}")
 
+    def _get_keyword_automaton(self, items: List[Tuple[str, Set[str]]]):
+        """
+        构建（或复用）包含所有类别关键词的 Aho-Corasick 自动机
+
+        参数:
+            items: [(类别名称, 关键词集合)]
+        返回:
+            ahocorasick.Automaton: 值为 (类别序号, 关键词) 的自动机
+        """
+        key = tuple((category, frozenset(keywords)) for category, keywords in items)
+        if getattr(self, '_automaton_key', None) != key:
+            automaton = ahocorasick.Automaton()
+            for cat_idx, (_, keywords) in enumerate(items):
+                for keyword in keywords:
+                    if not keyword:
+                        continue
+                    # 与正则一致，同时加入关键词的复数形式
+                    for word in _keyword_variants(keyword.lower()):
+                        # 同一关键词属于多个类别时，值中记录全部类别
+                        existing = automaton.get(word, (frozenset(), word))
+                        automaton.add_word(word, (existing[0] | {cat_idx}, word))
+            if len(automaton):
+                automaton.make_automaton()
+            self._automaton_key = key
+            self._automaton = automaton
+        return self._automaton
+
+    def _scan_categories_automaton(
+            self,
+            texts: pd.Series,
+            items: List[Tuple[str, Set[str]]]
+    ) -> List[Optional[Tuple[int, List[str]]]]:
+        """
+        用 Aho-Corasick 自动机一次扫描所有文本，得到各类别的匹配结果
+
+        参数:
+            texts: 标题与内容合并后的文本序列
+            items: [(类别名称, 关键词集合)]
+        返回:
+            List[Optional[Tuple[int, List[str]]]]: 与 items 顺序一致的 (提及次数, 最多3个示例)
+        """
+        automaton = self._get_keyword_automaton(items)
+        if not len(automaton):
+            return [None] * len(items)
+
+        counts = [0] * len(items)
+        examples = [[] for _ in items]
+        for text in texts:
+            lowered = text.lower()
+            hit = set()
+            for end, (cat_ids, word) in automaton.iter(lowered):
+                start = end - len(word) + 1
+                # 与正则的 \b 一致，只接受完整单词的匹配
+                if start > 0 and (lowered[start - 1].isalnum() or lowered[start - 1] == '_'):
+                    continue
+                if end + 1 < len(lowered) and (lowered[end + 1].isalnum() or lowered[end + 1] == '_'):
+                    continue
+                hit |= cat_ids
+            for cat_idx in hit:
+                counts[cat_idx] += 1
+                if len(examples[cat_idx]) < 3:  # 每个类别保存最多3个示例
+                    examples[cat_idx].append(text)
+
+        return [
+            (count, example) if count else None
+            for count, example in zip(counts, examples)
+        ]
+
+    def _scan_category(self, texts: pd.Series, keywords) -> Optional[Tuple[int, List[str]]]:
+        """
+        在合并后的评论文本中匹配单个类别的关键词
+
+        参数:
+            texts: 标题与内容合并后的文本序列
+            keywords: 类别关键词集合
+        返回:
+            Optional[Tuple[int, List[str]]]: (提及次数, 最多3个示例)，无提及时返回 None
+        """
+        keywords = frozenset(k for k in keywords if k)
+        if not keywords:
+            return None
+
+        mask = texts.str.contains(_compile_keyword_pattern(keywords), regex=True)
+        mentions = int(mask.sum())
+        if mentions == 0:
+            return None
+
+        # 每个类别保存最多3个示例
+        return mentions, texts[mask].head(3).tolist()
+
+    def _compute_polarity(self, df: pd.DataFrame) -> pd.Series:
+        """
+        获取每条评论内容的情感极性
+
+        DataProcessor 已对同一内容计算并写入“情感分数”列，直接复用；
+        缺少该列时才重新计算，相同内容只计算一次
+
+        参数:
+            df: 评论数据DataFrame
+        返回:
+            pd.Series: 与 df 索引对齐的情感极性
+        """
+        if '情感分数' in df.columns:
+            return df['情感分数'].astype(np.float64).fillna(0.0)
+
+        contents = df['内容']
+        polarities = {
+            text: self.sentiment_analyzer.polarity(text)
+            for text in contents.dropna().unique()
+        }
+        return contents.map(polarities).fillna(0.0)
+
+    def _example_positions(self, examples: List[str]) -> np.ndarray:
+        """
+        通过内容倒排索引查找示例文本所在的行位置
+
+        参数:
+            examples: 示例文本列表
+        返回:
+            np.ndarray: 按行顺序排列的行位置数组
+        """
+        positions = [
+            self._content_index[text] for text in examples
+            if text in self._content_index
+        ]
+        if not positions:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(positions))
+
     def _analyze_sentiment(self, df: pd.DataFrame, mention_results: Dict) -> Dict:
-        """分析情感倾向"""
+        """分析情感倾向（直接在 mention_results 的各类别数据上写入 'sentiment'，并返回同一字典）"""
         try:
-            results = mention_results.copy()
+            results = mention_results
 
-            # 跳过metadata键
-            categories = {k: v for k, v in results.items() if k != 'metadata'}
+            for category, data in results.items():
+                # 跳过metadata键
+                if category == 'metadata':
+                    continue
 
-            for category, data in categories.items():
                 if 'examples' in data:
-                    category_texts = df[df['内容'].isin(data['examples'])]['内容']
-                    if not category_texts.empty:
-                        sentiments = [
-                            self.sentiment_analyzer.analyze_sentiment(text)['polarity']
-                            for text in category_texts
-                        ]
-                        data['sentiment'] = {
-                            'mean': sum(sentiments) / len(sentiments),
-                            'positive': len([s for s in sentiments if s > 0]),
-                            'negative': len([s for s in sentiments if s < 0]),
-                            'neutral': len([s for s in sentiments if s == 0])
-                        }
+                    sentiments = self._polarity.iloc[self._example_positions(data['examples'])]
+                    if not sentiments.empty:
+                        data['sentiment'] = summarize_polarity(sentiments)
 
             return results
         except Exception as e:
@@ -445,9 +968,9 @@ class BaseAnalyzer(ABC):
 
         参数:
             df: 数据DataFrame
-            current_results: 当前的分析结果
+            current_results: 当前的分析结果（直接在各类别数据上写入 'trend'）
         返回:
-            Dict: 添加了趋势分析的结果
+            Dict: 添加了趋势分析的结果（与 current_results 为同一字典）
         """
         try:
             # 确保数据中有时间列
@@ -456,38 +979,32 @@ class BaseAnalyzer(ABC):
                 self.logger.warning(f"No date column '{date_column}' found for trend analysis")
                 return current_results
 
-            # 转换日期格式
-            df['date'] = pd.to_datetime(df[date_column])
+            # 日期只转换一次，不修改传入的 DataFrame
+            dates = pd.to_datetime(df[date_column])
 
-            # 为每个类别分析趋势
+            # 构建长格式数据（类别, 日期），所有类别一次分组重采样
+            frames = []
             for category, data in current_results.items():
                 if category == 'metadata':
                     continue
 
                 # 获取该类别的评论
-                category_df = df[df['内容'].isin(data.get('examples', []))]
+                positions = self._example_positions(data.get('examples', []))
+                if positions.size:
+                    frames.append(pd.DataFrame({'_cat': category, 'date': dates.iloc[positions].values}))
 
-                if not category_df.empty:
-                    # 按时间分组统计
-                    time_series = category_df.set_index('date').resample('D').size()
+            if not frames:
+                return current_results
 
-                    # 计算变化率
-                    if len(time_series) > 1:
-                        change_rate = (
-                            (time_series[-1] - time_series[0]) / time_series[0]
-                            if time_series[0] != 0 else 0
-                        )
-                    else:
-                        change_rate = 0
-
-                    # 添加趋势信息
-                    data['trend'] = {
-                        'time_series': time_series.to_dict(),
-                        'change_rate': change_rate,
-                        'trend_direction': 'increasing' if change_rate > 0.1
-                        else 'decreasing' if change_rate < -0.1
-                        else 'stable'
-                    }
+            long_df = pd.concat(frames, ignore_index=True)
+            trend_series = long_df.groupby('_cat').resample('D', on='date').size()
+
+            for category, time_series in trend_series.groupby(level=0):
+                time_series = time_series.droplevel(0)
+                data = current_results[category]
+
+                # 添加趋势信息
+                data['trend'] = self._summarize_time_series(time_series)
 
             return current_results
 
@@ -535,6 +1052,46 @@ class BaseAnalyzer(ABC):
                 'key_metrics': {}
             }
 
+    def _optional_insights(self, attributes: Dict[str, str]) -> Dict:
+        """
+        收集子类在分析过程中设置的附加洞察属性，未设置或为空的属性不写入结果
+
+        参数:
+            attributes: {结果键名: 属性名}
+        返回:
+            Dict: {结果键名: 属性值}
+        """
+        insights = {}
+        for key, attribute in attributes.items():
+            value = getattr(self, attribute, None)
+            if value:
+                insights[key] = value
+        return insights
+
+    def _summarize_time_series(self, time_series: pd.Series) -> Dict:
+        """
+        根据按时间重采样后的计数序列计算变化率和趋势方向
+
+        参数:
+            time_series: 以日期为索引的计数序列
+        返回:
+            Dict: 趋势数据
+        """
+        # 按位置取首尾值，在 NumPy 数组上计算
+        values = time_series.to_numpy()
+        if values.size > 1 and values[0] != 0:
+            change_rate = float((values[-1] - values[0]) / values[0])
+        else:
+            change_rate = 0.0
+
+        return {
+            'time_series': dict(zip(time_series.index.strftime('%Y-%m-%d'), values.tolist())),
+            'change_rate': change_rate,
+            'trend_direction': 'increasing' if change_rate > 0.1
+            else 'decreasing' if change_rate < -0.1
+            else 'stable'
+        }
+
     def _calculate_category_trend(
             self,
             df: pd.DataFrame,
@@ -556,29 +1113,16 @@ class BaseAnalyzer(ABC):
             df['date'] = pd.to_datetime(df['date'])
             time_series = df.set_index('date').resample('M').size()
 
-            # 计算变化率
-            if len(time_series) > 1:
-                change_rate = (
-                    (time_series[-1] - time_series[0]) / time_series[0]
-                    if time_series[0] != 0 else 0
-                )
-            else:
-                change_rate = 0
-
-            return {
-                'time_series': time_series.to_dict(),
-                'change_rate': change_rate,
-                'trend_direction': 'increasing' if change_rate > 0.1
-                else 'decreasing' if change_rate < -0.1
-                else 'stable'
-            }
+            return self._summarize_time_series(time_series)
         except Exception as e:
             raise ProcessingError(f"Error calculating trend: {str(e)}")
 
     def cross_analyze(
             self,
             df: pd.DataFrame,
-            other_analyzer: 'BaseAnalyzer'
+            other_analyzer: 'BaseAnalyzer',
+            this_results: Dict = None,
+            other_results: Dict = None
     ) -> Dict:
         """
         与其他维度进行交叉分析
@@ -586,13 +1130,17 @@ class BaseAnalyzer(ABC):
         参数:
             df: 数据DataFrame
             other_analyzer: 另一个分析器实例
+            this_results: 本维度已有的分析结果（可选，提供时不再重新分析）
+            other_results: 另一维度已有的分析结果（可选，提供时不再重新分析）
         返回:
             Dict: 交叉分析结果
         """
         try:
             # 获取两个维度的分析结果
-            this_results = self.analyze(df)
-            other_results = other_analyzer.analyze(df)
+            if this_results is None:
+                this_results = self.analyze(df)
+            if other_results is None:
+                other_results = other_analyzer.analyze(df)
 
             # 计算维度间的关联
             correlations = self._calculate_correlations(
@@ -631,6 +1179,10 @@ class BaseAnalyzer(ABC):
         try:
             correlations = []
 
+            # 每个类别的示例只哈希一次，类别两两比较时只对整数集合求交集
+            example_ids1 = {cat: self._example_ids(data) for cat, data in results1.items()}
+            example_ids2 = {cat: self._example_ids(data) for cat, data in results2.items()}
+
             for cat1 in results1.keys():
                 if cat1 == 'metadata':
                     continue
@@ -645,7 +1197,9 @@ class BaseAnalyzer(ABC):
                             cat2,
                             results1[cat1],
                             results2[cat2],
-                            df
+                            df,
+                            example_ids1[cat1],
+                            example_ids2[cat2]
                         )
 
                         if correlation['strength'] > 0.1:  # 只保留显著的关联
@@ -660,13 +1214,29 @@ class BaseAnalyzer(ABC):
         except Exception as e:
             raise ProcessingError(f"Error calculating correlations: {str(e)}")
 
+    @staticmethod
+    def _example_ids(data) -> frozenset:
+        """
+        将类别示例转换为哈希值集合
+
+        参数:
+            data: 类别数据
+        返回:
+            frozenset: 示例文本的哈希值集合
+        """
+        if not isinstance(data, dict):
+            return frozenset()
+        return frozenset(map(hash, data.get('examples', [])))
+
     def _calculate_single_correlation(
             self,
             cat1: str,
             cat2: str,
             data1: Dict,
             data2: Dict,
-            df: pd.DataFrame
+            df: pd.DataFrame,
+            ids1: frozenset = None,
+            ids2: frozenset = None
     ) -> Dict:
         """
         计算两个类别间的具体关联关系
@@ -677,15 +1247,19 @@ class BaseAnalyzer(ABC):
             data1: 第一个类别的数据
             data2: 第二个类别的数据
             df: 原始数据
+            ids1: 第一个类别示例的哈希值集合（可选，未提供时即时计算）
+            ids2: 第二个类别示例的哈希值集合（可选，未提供时即时计算）
         返回:
             Dict: 关联关系
         """
         try:
+            if ids1 is None:
+                ids1 = self._example_ids(data1)
+            if ids2 is None:
+                ids2 = self._example_ids(data2)
+
             # 计算共现频率
-            cooccurrence = len(
-                set(data1.get('examples', [])) &
-                set(data2.get('examples', []))
-            )
+            cooccurrence = len(ids1 & ids2)
 
             # 计算关联强度
             strength = cooccurrence / (
@@ -2,23 +2,53 @@
 产品设计期望分析器
 功能：分析用户对产品设计的期望、评价和建议，包括外观、交互、人体工程学等方面
 """
-from typing import Dict, Set, List, Tuple
-import spacy
-from collections import defaultdict
+import sys
+from typing import Dict, Set, List, Tuple, Optional
+from spacy.symbols import ADJ, NOUN, VERB, acomp, advmod, pobj, prep, xcomp
+from ..utils.keyword_matcher import KeywordMatcher
 from .base_analyzer import BaseAnalyzer
 from datetime import datetime
 
 
+# 依存关系与词性使用整数 ID 比较，避免逐个 Token 查询字符串属性
+_DESCRIPTION_POS = frozenset({ADJ, NOUN})
+_POST_MODIFIER_DEPS = frozenset({prep, advmod})
+_COMPLEMENT_DEPS = frozenset({acomp, xcomp})
+
+# 与设计感受相关的动词（如"fits well", "looks good"）
+DESIGN_VERBS = frozenset({'look', 'feel', 'fit', 'work', 'handle'})
+
+# 设计期望专属洞察的文本模板
+DESIGN_INSIGHT_TEMPLATES = {
+    'aesthetics_positive': (
+        "Users appreciate the product's {sub}, "
+        "indicating successful design choices"
+    ),
+    'aesthetics_negative': (
+        "The product's {sub} could be improved "
+        "to better meet user expectations"
+    ),
+    'ergonomics': (
+        "{sub_title} is a significant factor "
+        "in user experience and satisfaction"
+    ),
+    'interaction': (
+        "User interaction through {sub} plays a key role "
+        "in product usability"
+    ),
+    'dimensions': (
+        "Product {sub} is an important consideration "
+        "for users in their usage context"
+    )
+}
+
+
 class DesignExpectationAnalyzer(BaseAnalyzer):
+    supports_doc_extraction = True
+
     def __init__(self):
         """初始化产品设计期望分析器"""
         super().__init__()
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            import os
-            os.system('python -m spacy download en_core_web_sm')
-            self.nlp = spacy.load('en_core_web_sm')
 
         # 初始化设计期望相关的模式
         self.design_patterns = {
@@ -80,6 +110,16 @@ class DesignExpectationAnalyzer(BaseAnalyzer):
             }
         }
 
+        # 预编译关键词匹配器，分类时只需扫描一次文本
+        self._design_matcher = KeywordMatcher(self.design_patterns)
+
+        # 预先拆分类别名称 {类别: (主类别, 子类别)}
+        self._category_parts = {
+            f"{main_category}_{sub_category}": (main_category, sub_category)
+            for main_category, subcategories in self.design_patterns.items()
+            for sub_category in subcategories
+        }
+
     def _extract_categories(self, df) -> Dict[str, Set[str]]:
         """
         从评论中提取设计期望相关的类别和关键词
@@ -89,60 +129,61 @@ class DesignExpectationAnalyzer(BaseAnalyzer):
         返回:
             Dict[str, Set[str]]: {设计类别: {相关关键词集合}}
         """
-        design_keywords = defaultdict(set)
-
-        # 分析每条评论
-        for _, row in df.iterrows():
-            text = f"{row['标题']} {row['内容']}"
-            doc = self.nlp(text.lower())
-
-            # 提取设计相关的短语
-            for sent in doc.sents:
-                design_phrases = self._extract_design_phrases(sent)
-
-                # 将短语分类到相应的设计类别中
-                for phrase, category in design_phrases:
-                    design_keywords[category].add(phrase)
-
-        # 过滤掉提及次数过少的类别
-        min_mentions = 2
-        filtered_designs = {
-            category: keywords
-            for category, keywords in design_keywords.items()
-            if len(keywords) >= min_mentions
-        }
+        return self._extract_doc_categories(df)
+
+    def _category_labels(self) -> List[str]:
+        """
+        全部设计类别名称（序号与 _design_matcher 返回的类别序号一致）
+
+        返回:
+            List[str]: 设计类别名称列表
+        """
+        return self._design_matcher.labels
+
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单条评论的 Doc 中提取设计相关的短语
+
+        参数:
+            doc: spaCy的Doc对象
+            buckets: 按设计类别序号索引的短语列表
+        """
+        # 整篇评论只扫描一次关键词片段，没有任何片段的句子中的短语都不会归入设计类别，跳过逐词分析
+        for sent in self._design_matcher.candidate_sents(doc):
+            design_phrases = self._extract_design_phrases(sent)
 
-        return filtered_designs
+            # 将短语分类到相应的设计类别中
+            for phrase, category in design_phrases:
+                buckets[category].append(sys.intern(phrase))
 
-    def _extract_design_phrases(self, sent) -> List[Tuple[str, str]]:
+    def _extract_design_phrases(self, sent) -> List[Tuple[str, int]]:
         """
         从句子中提取设计相关的短语及其类别
 
         参数:
             sent: spaCy的Span对象（句子）
         返回:
-            List[Tuple[str, str]]: [(短语, 类别)]
+            List[Tuple[str, int]]: [(短语, 类别序号)]
         """
         phrases = []
 
         for token in sent:
+            pos = token.pos
             # 检查形容词-名词搭配
-            if token.pos_ in {'ADJ', 'NOUN'}:
+            if pos in _DESCRIPTION_POS:
                 design_phrase = self._extract_design_description(token)
                 if design_phrase:
                     category = self._determine_design_category(design_phrase)
-                    if category:
+                    if category is not None:
                         phrases.append((design_phrase, category))
 
             # 检查动词短语（如"fits well", "looks good"）
-            elif token.pos_ == 'VERB':
-                for pattern in {'look', 'feel', 'fit', 'work', 'handle'}:
-                    if token.lemma_ == pattern:
-                        design_phrase = self._extract_verb_phrase(token)
-                        if design_phrase:
-                            category = self._determine_design_category(design_phrase)
-                            if category:
-                                phrases.append((design_phrase, category))
+            elif pos == VERB and token.lemma_ in DESIGN_VERBS:
+                design_phrase = self._extract_verb_phrase(token)
+                if design_phrase:
+                    category = self._determine_design_category(design_phrase)
+                    if category is not None:
+                        phrases.append((design_phrase, category))
 
         return phrases
 
@@ -155,24 +196,19 @@ class DesignExpectationAnalyzer(BaseAnalyzer):
         返回:
             str: 设计描述短语
         """
-        description_parts = []
-
-        # 添加前置修饰语
-        for child in token.children:
-            if child.dep_ in {'amod', 'compound'} and child.i < token.i:
-                description_parts.append(child.text)
+        # 添加前置修饰语（lefts 只包含位于核心词之前的子节点）
+        description_parts = [child.text for child in token.lefts if child.dep in self._pre_modifier_deps]
 
         # 添加核心词
         description_parts.append(token.text)
 
         # 添加后置修饰语
-        for child in token.children:
-            if child.dep_ in {'prep', 'advmod'} and child.i > token.i:
-                prep_phrase = [child.text]
+        for child in token.rights:
+            if child.dep in _POST_MODIFIER_DEPS:
+                description_parts.append(child.text)
                 for grandchild in child.children:
-                    if grandchild.dep_ == 'pobj':
-                        prep_phrase.extend(t.text for t in grandchild.subtree)
-                description_parts.extend(prep_phrase)
+                    if grandchild.dep == pobj:
+                        description_parts.extend(t.text for t in grandchild.subtree)
 
         return ' '.join(description_parts) if description_parts else None
 
@@ -189,42 +225,44 @@ class DesignExpectationAnalyzer(BaseAnalyzer):
 
         # 添加副词修饰语
         for child in token.children:
-            if child.dep_ == 'advmod':
+            dep = child.dep
+            if dep == advmod:
                 phrase_parts.append(child.text)
 
             # 添加补语
-            elif child.dep_ in {'acomp', 'xcomp'}:
+            elif dep in _COMPLEMENT_DEPS:
                 phrase_parts.extend(t.text for t in child.subtree)
 
         return ' '.join(phrase_parts) if len(phrase_parts) > 1 else None
 
-    def _determine_design_category(self, text: str) -> str:
+    def _determine_design_category(self, text: str) -> Optional[int]:
         """
         确定设计描述属于哪个类别
 
         参数:
-            text: 设计描述文本
+            text: 设计描述文本（小写）
         返回:
-            str: 设计类别名称
+            Optional[int]: 设计类别序号（见 _category_labels），无匹配时为 None
         """
-        text = text.lower()
-        for main_category, subcategories in self.design_patterns.items():
-            for sub_category, keywords in subcategories.items():
-                if any(keyword in text for keyword in keywords):
-                    return f"{main_category}_{sub_category}"
-        return None
+        # 短语取自已转为小写的 Doc，无需再次转换
+        return self._design_matcher.match_id(text)
 
     def _generate_insights(self, trend_results: Dict) -> Dict:
         """生成设计期望相关的分析洞察"""
         base_insights = super()._generate_insights(trend_results)
 
+        # 使用 analyze() 开始时记录的时间，isoformat 输出与 '%Y-%m-%d %H:%M:%S' 相同的格式
+        timestamp = (self.analysis_metadata.get('start_time') or datetime.now()).isoformat(
+            sep=' ', timespec='seconds'
+        )
+
         # 添加设计特定的分析
         design_insights = {
             'design_satisfaction': {
                 'aesthetics_score': getattr(self, 'aesthetics_score', 0),
                 'ergonomics_score': getattr(self, 'ergonomics_score', 0),
                 'interaction_score': getattr(self, 'interaction_score', 0),
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # 格式化日期时间
+                'timestamp': timestamp
             },
             'design_preferences': getattr(self, 'design_preferences', {}),
             'improvement_suggestions': getattr(self, 'design_suggestions', [])
@@ -238,75 +276,53 @@ class DesignExpectationAnalyzer(BaseAnalyzer):
         生成设计期望专属的洞察
         """
         for category, data in results.items():
-            # 确保 data 是字典类型
+            # 只处理 "主类别_子类别" 形式且数据为字典的类别（跳过 total、metadata 等）
             if not isinstance(data, dict):
                 continue
-
-            specific_insights = []
-
-            try:
-                # 安全地分解类别名称
-                if '_' in category:
-                    main_cat, sub_cat = category.split('_', 1)
-                else:
+            parts = self._category_parts.get(category)
+            if parts is None:
+                if not isinstance(category, str) or '_' not in category:
                     continue
+                parts = category.split('_', 1)
+            main_cat, sub_cat = parts
 
-                # 基于不同设计维度生成洞察
-                if data.get('percentage', 0) > 15:
-                    # 美学相关洞察
-                    if main_cat == 'aesthetics':
-                        sentiment = data.get('sentiment', {})
-                        pos_count = sentiment.get('positive', 0)
-                        neg_count = sentiment.get('negative', 0)
-
-                        if pos_count > neg_count:
-                            specific_insights.append(
-                                f"Users appreciate the product's {sub_cat}, "
-                                "indicating successful design choices"
-                            )
-                        else:
-                            specific_insights.append(
-                                f"The product's {sub_cat} could be improved "
-                                "to better meet user expectations"
-                            )
-
-                # 人体工程学相关洞察
-                elif main_cat == 'ergonomics':
-                    specific_insights.append(
-                        f"{sub_cat.title()} is a significant factor "
-                        "in user experience and satisfaction"
-                    )
-
-                # 交互相关洞察
-                elif main_cat == 'interaction':
-                    specific_insights.append(
-                        f"User interaction through {sub_cat} plays a key role "
-                        "in product usability"
-                    )
-
-                # 尺寸相关洞察
-                elif main_cat == 'dimensions':
-                    specific_insights.append(
-                        f"Product {sub_cat} is an important consideration "
-                        "for users in their usage context"
-                    )
-
-                # 添加专属洞察
-                if specific_insights:
-                    data['insights'] = data.get('insights', []) + specific_insights
-
-            except Exception as e:
-                self.logger.warning(f"Error generating insights for category {category}: {str(e)}")
+            percentage = data.get('percentage', 0)
+            if not isinstance(percentage, (int, float)):
                 continue
 
+            specific_insights = []
+
+            # 基于不同设计维度生成洞察
+            if percentage > 15:
+                # 美学相关洞察
+                if main_cat == 'aesthetics':
+                    sentiment = data.get('sentiment')
+                    if not isinstance(sentiment, dict):
+                        sentiment = {}
+                    pos_count = sentiment.get('positive', 0)
+                    neg_count = sentiment.get('negative', 0)
+                    template_key = 'aesthetics_positive' if pos_count > neg_count else 'aesthetics_negative'
+                    specific_insights.append(DESIGN_INSIGHT_TEMPLATES[template_key].format(sub=sub_cat))
+
+            # 人体工程学、交互、尺寸相关洞察
+            elif main_cat in ('ergonomics', 'interaction', 'dimensions'):
+                specific_insights.append(
+                    DESIGN_INSIGHT_TEMPLATES[main_cat].format(sub=sub_cat, sub_title=sub_cat.title())
+                )
+
+            # 添加专属洞察
+            if specific_insights:
+                data.setdefault('insights', []).extend(specific_insights)
+
         return results
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析设计期望
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 设计期望分析结果
         """
@@ -314,7 +330,7 @@ class DesignExpectationAnalyzer(BaseAnalyzer):
         self.df = df
 
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加设计期望专属的洞察
         results = self._generate_design_specific_insights(results)
@@ -2,22 +2,45 @@
 用户体验分析器
 功能：分析用户使用产品的体验，包括满意度、问题点、情感反应和具体反馈
 """
+import sys
 from typing import List, Tuple, Dict, Set, Optional
-from collections import defaultdict
+from spacy.symbols import acomp, advmod, amod, dobj, pobj, prep
+from ..utils.keyword_matcher import KeywordMatcher
 from .base_analyzer import BaseAnalyzer, ProcessingError
-import spacy
+
+
+# 依存关系使用整数 ID 比较，避免逐个 Token 查询字符串属性
+_PRE_MODIFIER_DEPS = frozenset({amod, advmod})
+_POST_MODIFIER_DEPS = frozenset({prep, dobj, acomp})
+
+# 各体验维度生成专属洞察的占比阈值（%）
+EXPERIENCE_INSIGHT_THRESHOLDS = {
+    'satisfaction': 30,
+    'usability': 20,
+    'performance': 25,
+    'issues': 15
+}
+
+# 用户体验专属洞察的文本模板
+EXPERIENCE_INSIGHT_TEMPLATES = {
+    'satisfaction_positive': "Users express high overall satisfaction with the product",
+    'satisfaction': "There are significant user satisfaction concerns to address",
+    'usability': (
+        "Users frequently mention {sub_display}, "
+        "indicating its importance in the user experience"
+    ),
+    'performance': "Product {sub} is a key factor in user experience",
+    'issues': "Users report notable {sub} issues that need attention"
+}
 
 
 class ExperienceAnalyzer(BaseAnalyzer):
+    supports_doc_extraction = True
+    min_mentions = 3
+
     def __init__(self):
         """初始化用户体验分析器"""
         super().__init__()
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            import os
-            os.system('python -m spacy download en_core_web_sm')
-            self.nlp = spacy.load('en_core_web_sm')
 
         # 初始化用户体验相关的模式（移到这里）
         self.experience_patterns = {
@@ -77,6 +100,18 @@ class ExperienceAnalyzer(BaseAnalyzer):
             }
         }
 
+        # 预编译关键词匹配器，分类时只需扫描一次文本
+        self._experience_matcher = KeywordMatcher(self.experience_patterns)
+
+        # 预先拆分类别名称 {类别: (主类别, 子类别, 子类别展示名)}
+        self._category_parts = {
+            f"{main_category}_{sub_category}": (
+                main_category, sub_category, sub_category.replace('_', ' ')
+            )
+            for main_category, subcategories in self.experience_patterns.items()
+            for sub_category in subcategories
+        }
+
     def _extract_categories(self, df) -> Dict[str, Set[str]]:
         """
         从评论中提取用户体验相关的类别和关键词
@@ -87,61 +122,62 @@ class ExperienceAnalyzer(BaseAnalyzer):
             Dict[str, Set[str]]: {体验类别: {相关关键词集合}}
         """
         try:
-            experience_keywords = defaultdict(set)
+            return self._extract_doc_categories(df)
 
-            # 分析每条评论
-            for _, row in df.iterrows():
-                try:
-                    text = f"{row['标题']} {row['内容']}"
-                    doc = self.nlp(text.lower())
+        except Exception as e:
+            self.logger.error(f"Category extraction failed: {str(e)}")
+            raise ProcessingError(f"Failed to extract experience categories: {str(e)}")
+
+    def _category_labels(self) -> List[str]:
+        """
+        全部体验类别名称（序号与 _experience_matcher 返回的类别序号一致）
 
-                    # 提取体验相关的短语
-                    for sent in doc.sents:
-                        try:
-                            # 分析每个句子的情感和体验描述
-                            experience_phrases = self._extract_experience_phrases(sent)
+        返回:
+            List[str]: 体验类别名称列表
+        """
+        return self._experience_matcher.labels
+
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单条评论的 Doc 中提取体验相关的短语
 
-                            # 将短语分类到相应的体验类别中
-                            for phrase, category in experience_phrases:
-                                experience_keywords[category].add(phrase)
+        参数:
+            doc: spaCy的Doc对象
+            buckets: 按体验类别序号索引的短语列表
+        """
+        try:
+            # 提取体验相关的短语：整篇评论只扫描一次关键词片段，没有任何片段的句子中的短语都不会归入体验类别，跳过逐词分析
+            for sent in self._experience_matcher.candidate_sents(doc):
+                try:
+                    # 分析每个句子的情感和体验描述
+                    experience_phrases = self._extract_experience_phrases(sent)
 
-                        except Exception as e:
-                            self.logger.warning(f"Error processing sentence: {str(e)}")
-                            continue
+                    # 将短语分类到相应的体验类别中
+                    for phrase, category in experience_phrases:
+                        buckets[category].append(sys.intern(phrase))
 
                 except Exception as e:
-                    self.logger.warning(f"Error processing row: {str(e)}")
+                    self.logger.warning(f"Error processing sentence: {str(e)}")
                     continue
 
-            # 过滤掉提及次数过少的类别
-            min_mentions = 3
-            filtered_experiences = {
-                category: keywords
-                for category, keywords in experience_keywords.items()
-                if len(keywords) >= min_mentions
-            }
-
-            return filtered_experiences
-
         except Exception as e:
-            self.logger.error(f"Category extraction failed: {str(e)}")
-            raise ProcessingError(f"Failed to extract experience categories: {str(e)}")
+            self.logger.warning(f"Error processing row: {str(e)}")
 
-    def _extract_experience_phrases(self, sent) -> List[Tuple[str, str]]:
+    def _extract_experience_phrases(self, sent) -> List[Tuple[str, int]]:
         """
         从句子中提取体验相关的短语及其类别
 
         参数:
             sent: spaCy的Span对象（句子）
         返回:
-            List[Tuple[str, str]]: [(短语, 类别)]
+            List[Tuple[str, int]]: [(短语, 类别序号)]
         """
         phrases = []
 
         for token in sent:
             # 检查是否是体验相关的词
             category = self._check_experience_category(token.text)
-            if category:
+            if category is not None:
                 # 提取完整的体验描述短语
                 phrase = self._extract_descriptive_phrase(token)
                 if phrase:
@@ -153,25 +189,21 @@ class ExperienceAnalyzer(BaseAnalyzer):
                     if child.pos_ == 'NOUN':
                         compound = f"{token.text} {child.text}"
                         category = self._check_experience_category(compound)
-                        if category:
+                        if category is not None:
                             phrases.append((compound, category))
 
         return phrases
 
-    def _check_experience_category(self, text: str) -> str:
+    def _check_experience_category(self, text: str) -> Optional[int]:
         """
         检查文本属于哪个体验类别
 
         参数:
             text: 待检查的文本
         返回:
-            str: 体验类别名称
+            Optional[int]: 体验类别序号（见 _category_labels），无匹配时为 None
         """
-        for main_category, subcategories in self.experience_patterns.items():
-            for sub_category, keywords in subcategories.items():
-                if any(keyword in text for keyword in keywords):
-                    return f"{main_category}_{sub_category}"
-        return None
+        return self._experience_matcher.match_id(text)
 
     def _extract_descriptive_phrase(self, token) -> str:
         """
@@ -182,24 +214,21 @@ class ExperienceAnalyzer(BaseAnalyzer):
         返回:
             str: 描述性短语
         """
-        phrase_parts = []
-
-        # 添加前置修饰语
-        for child in token.children:
-            if child.dep_ in {'amod', 'advmod'} and child.i < token.i:
-                phrase_parts.append(child.text)
+        # 添加前置修饰语（lefts 只包含位于核心词之前的子节点）
+        phrase_parts = [child.text for child in token.lefts if child.dep in _PRE_MODIFIER_DEPS]
 
         # 添加核心词
         phrase_parts.append(token.text)
 
         # 添加后置修饰语
-        for child in token.children:
-            if child.dep_ in {'prep', 'dobj', 'acomp'} and child.i > token.i:
+        for child in token.rights:
+            dep = child.dep
+            if dep in _POST_MODIFIER_DEPS:
                 phrase_parts.append(child.text)
                 # 添加介词短语的宾语
-                if child.dep_ == 'prep':
+                if dep == prep:
                     for grandchild in child.children:
-                        if grandchild.dep_ == 'pobj':
+                        if grandchild.dep == pobj:
                             phrase_parts.append(grandchild.text)
 
         return ' '.join(phrase_parts) if phrase_parts else None
@@ -236,62 +265,42 @@ class ExperienceAnalyzer(BaseAnalyzer):
             specific_insights = []
 
             # 添加安全检查
-            if '_' in category:
-                main_cat, sub_cat = category.split('_')
-            else:
-                main_cat = category
-                sub_cat = category
-                continue  # 跳过不符合格式的类别
+            parts = self._category_parts.get(category)
+            if parts is None:
+                if '_' not in category:
+                    continue  # 跳过不符合格式的类别
+                main_cat, sub_cat = category.split('_', 1)
+                parts = (main_cat, sub_cat, sub_cat.replace('_', ' '))
+            main_cat, sub_cat, sub_display = parts
 
             # 基于不同体验维度生成洞察
-            if main_cat == 'satisfaction':
-                if data['percentage'] > 30:
-                    if sub_cat == 'positive':
-                        specific_insights.append(
-                            "Users express high overall satisfaction with the product"
-                        )
-                    else:
-                        specific_insights.append(
-                            "There are significant user satisfaction concerns to address"
-                        )
-
-            elif main_cat == 'usability':
-                if data['percentage'] > 20:
-                    specific_insights.append(
-                        f"Users frequently mention {sub_cat.replace('_', ' ')}, "
-                        "indicating its importance in the user experience"
-                    )
-
-            elif main_cat == 'performance':
-                if data['percentage'] > 25:
-                    specific_insights.append(
-                        f"Product {sub_cat} is a key factor in user experience"
-                    )
-
-            elif main_cat == 'issues':
-                if data['percentage'] > 15:
-                    specific_insights.append(
-                        f"Users report notable {sub_cat} issues that need attention"
-                    )
+            threshold = EXPERIENCE_INSIGHT_THRESHOLDS.get(main_cat)
+            if threshold is not None and data['percentage'] > threshold:
+                if main_cat == 'satisfaction':
+                    template_key = 'satisfaction_positive' if sub_cat == 'positive' else 'satisfaction'
+                else:
+                    template_key = main_cat
+                specific_insights.append(
+                    EXPERIENCE_INSIGHT_TEMPLATES[template_key].format(sub=sub_cat, sub_display=sub_display)
+                )
 
             # 添加专属洞察
-            if 'insights' not in data:
-                data['insights'] = []
-            data['insights'].extend(specific_insights)
+            data.setdefault('insights', []).extend(specific_insights)
 
         return results
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析用户体验
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 用户体验分析结果
         """
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加用户体验专属的洞察
         results = self._generate_experience_specific_insights(results)
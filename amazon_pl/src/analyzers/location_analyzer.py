@@ -2,22 +2,41 @@
 使用地点分析器
 功能：分析用户在什么地点使用产品，包括具体空间、场景和环境特征
 """
-from typing import Dict, Set
-import spacy
-from collections import defaultdict
+import sys
+from functools import cached_property
+from typing import Dict, List, Set, Optional
+from spacy.matcher import PhraseMatcher
+from spacy.symbols import ADJ, NOUN, dobj, nsubj, pobj, prep
+from ..utils.keyword_matcher import KeywordMatcher
 from .base_analyzer import BaseAnalyzer
 
 
+# 依存关系与词性使用整数 ID 比较，避免逐个 Token 查询字符串属性
+_LOCATION_HEAD_DEPS = frozenset({pobj, dobj, nsubj})
+
+# 使用地点专属洞察的文本模板
+LOCATION_INSIGHT_TEMPLATES = {
+    'key_environment': (
+        "{} represents a key usage environment, "
+        "suggesting importance of optimizing for this space"
+    ),
+    'positive': (
+        "Users report particularly positive experiences when using "
+        "the product in {} settings"
+    ),
+    'challenging': (
+        "Users face some challenges when using the product in "
+        "{} environments"
+    )
+}
+
+
 class LocationAnalyzer(BaseAnalyzer):
+    supports_doc_extraction = True
+
     def __init__(self):
         """初始化使用地点分析器"""
         super().__init__()
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            import os
-            os.system('python -m spacy download en_core_web_sm')
-            self.nlp = spacy.load('en_core_web_sm')
 
         # 初始化地点相关的模式
         self.location_patterns = {
@@ -57,6 +76,15 @@ class LocationAnalyzer(BaseAnalyzer):
             }
         }
 
+        # 预编译关键词匹配器，分类时只需扫描一次文本
+        self._location_matcher = KeywordMatcher(self.location_patterns)
+
+        # 预先生成类别的展示名称 {类别: (标题形式, 普通形式)}
+        self._display_names = {
+            label: (label.replace('_', ' ').title(), label.replace('_', ' '))
+            for label in self._location_matcher.labels
+        }
+
     def _extract_categories(self, df) -> Dict[str, Set[str]]:
         """
         从评论中提取地点相关的类别和关键词
@@ -66,35 +94,82 @@ class LocationAnalyzer(BaseAnalyzer):
         返回:
             Dict[str, Set[str]]: {地点类别: {相关关键词集合}}
         """
-        location_keywords = defaultdict(set)
+        return self._extract_doc_categories(df)
+
+    def _category_labels(self) -> List[str]:
+        """
+        全部地点类别名称（序号与 _location_matcher 返回的类别序号一致）
+
+        返回:
+            List[str]: 地点类别名称列表
+        """
+        return self._location_matcher.labels
 
-        # 分析每条评论
-        for _, row in df.iterrows():
-            text = f"{row['标题']} {row['内容']}"
-            doc = self.nlp(text.lower())
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单条评论的 Doc 中提取地点短语
+
+        参数:
+            doc: spaCy的Doc对象
+            buckets: 按地点类别序号索引的短语列表
+        """
+        # 由 PhraseMatcher 直接定位地点关键词，只在命中位置附近提取短语
+        visited = set()
+        for _, start, end in self._location_phrase_matcher(doc):
+            for token in self._location_candidates(doc[start:end].root):
+                if token.i in visited:
+                    continue
+                visited.add(token.i)
 
-            # 提取地点相关的短语
-            for sent in doc.sents:
                 # 使用依存句法分析找到地点相关的短语
-                for token in sent:
-                    if token.dep_ in {'pobj', 'dobj', 'nsubj'} or token.pos_ == 'NOUN':
-                        # 检查是否匹配任何地点模式
-                        location_phrase = self._extract_location_phrase(token)
-                        if location_phrase:
-                            # 确定地点类别
-                            category = self._determine_location_category(location_phrase)
-                            if category:
-                                location_keywords[category].add(location_phrase)
-
-        # 过滤掉提及次数过少的类别
-        min_mentions = 2
-        filtered_locations = {
-            category: keywords
-            for category, keywords in location_keywords.items()
-            if len(keywords) >= min_mentions
-        }
+                if token.dep in _LOCATION_HEAD_DEPS or token.pos == NOUN:
+                    location_phrase = self._extract_location_phrase(token)
+                    if location_phrase:
+                        # 确定地点类别
+                        category = self._determine_location_category(location_phrase)
+                        if category is not None:
+                            buckets[category].append(sys.intern(location_phrase))
 
-        return filtered_locations
+    @cached_property
+    def _location_phrase_matcher(self) -> PhraseMatcher:
+        """
+        包含所有地点关键词（及其复数形式）的 PhraseMatcher（首次使用时构建）
+
+        返回:
+            PhraseMatcher: 按小写形式匹配的短语匹配器
+        """
+        matcher = PhraseMatcher(self.nlp.vocab, attr='LOWER')
+        for main_category, subcategories in self.location_patterns.items():
+            for sub_category, keywords in subcategories.items():
+                phrases = {
+                    variant
+                    for keyword in keywords
+                    for variant in (keyword, keyword + 's', keyword + 'es')
+                }
+                matcher.add(
+                    f"{main_category}_{sub_category}",
+                    [self.nlp.make_doc(phrase) for phrase in sorted(phrases)]
+                )
+        return matcher
+
+    def _location_candidates(self, token) -> List:
+        """
+        根据命中的关键词 Token 找到可能构成地点短语的核心词
+
+        参数:
+            token: 命中关键词的 spaCy Token
+        返回:
+            List: 候选核心词（关键词作修饰语时取其中心词；作介词宾语时同时包含介词所修饰的词）
+        """
+        # 关键词作修饰语时（如 kitchen table），短语以中心词为核心
+        while token.dep in self._pre_modifier_deps and token.head is not token:
+            token = token.head
+
+        candidates = [token]
+        # 关键词作介词宾语时（如 room in the kitchen），介词所修饰的词的短语也包含该关键词
+        if token.dep_ == 'pobj' and token.head.dep_ == 'prep':
+            candidates.append(token.head.head)
+        return candidates
 
     def _extract_location_phrase(self, token) -> str:
         """
@@ -105,43 +180,37 @@ class LocationAnalyzer(BaseAnalyzer):
         返回:
             str: 地点短语
         """
-        phrase_tokens = []
+        children = list(token.children)
 
         # 添加修饰语
-        for child in token.children:
-            if child.dep_ in {'amod', 'compound'} or child.pos_ == 'ADJ':
-                phrase_tokens.append(child.text)
+        phrase_tokens = [
+            child.text for child in children
+            if child.dep in self._pre_modifier_deps or child.pos == ADJ
+        ]
 
         # 添加核心词
         phrase_tokens.append(token.text)
 
         # 添加后置修饰语
-        for child in token.children:
-            if child.dep_ == 'prep':
-                prep_phrase = []
-                prep_phrase.append(child.text)
-                for grandchild in child.children:
-                    if grandchild.dep_ == 'pobj':
-                        prep_phrase.append(grandchild.text)
-                phrase_tokens.extend(prep_phrase)
+        for child in children:
+            if child.dep == prep:
+                phrase_tokens.append(child.text)
+                phrase_tokens.extend(
+                    grandchild.text for grandchild in child.children if grandchild.dep == pobj
+                )
 
         return ' '.join(phrase_tokens)
 
-    def _determine_location_category(self, phrase: str) -> str:
+    def _determine_location_category(self, phrase: str) -> Optional[int]:
         """
         确定地点短语属于哪个类别
 
         参数:
             phrase: 地点短语
         返回:
-            str: 地点类别名称
+            Optional[int]: 地点类别序号（见 _category_labels），无匹配时为 None
         """
-        for main_category, subcategories in self.location_patterns.items():
-            for sub_category, keywords in subcategories.items():
-                for keyword in keywords:
-                    if keyword in phrase:
-                        return f"{main_category}_{sub_category}"
-        return None
+        return self._location_matcher.match_id(phrase)
 
     def _generate_location_specific_insights(self, results: Dict) -> Dict:
         """
@@ -154,35 +223,30 @@ class LocationAnalyzer(BaseAnalyzer):
         """
         for category, data in results.items():
             # 确保 data 是字典类型
-            if isinstance(data, dict):
-                specific_insights = []
-
-                # 基于使用地点的特定洞察
-                if data.get('percentage', 0) > 30:
-                    category_name = category.replace('_', ' ').title()
-                    specific_insights.append(
-                        f"{category_name} represents a key usage environment, "
-                        "suggesting importance of optimizing for this space"
-                    )
-
-                # 基于情感分析的特定洞察
-                if 'sentiment' in data and 'mention_count' in data and data['mention_count'] > 0:
-                    pos_rate = (data['sentiment'].get('positive', 0) /
-                                data['mention_count']) * 100
-                    if pos_rate > 70:
-                        specific_insights.append(
-                            f"Users report particularly positive experiences when using "
-                            f"the product in {category.replace('_', ' ')} settings"
-                        )
-                    elif pos_rate < 30:
-                        specific_insights.append(
-                            f"Users face some challenges when using the product in "
-                            f"{category.replace('_', ' ')} environments"
-                        )
-
-                # 添加专属洞察
-                if specific_insights:
-                    data['insights'] = data.get('insights', []) + specific_insights
+            if not isinstance(data, dict):
+                continue
+
+            title_name, plain_name = self._display_names.get(category) or (
+                category.replace('_', ' ').title(), category.replace('_', ' ')
+            )
+            specific_insights = []
+
+            # 基于使用地点的特定洞察
+            if data.get('percentage', 0) > 30:
+                specific_insights.append(LOCATION_INSIGHT_TEMPLATES['key_environment'].format(title_name))
+
+            # 基于情感分析的特定洞察
+            if 'sentiment' in data and data.get('mention_count', 0) > 0:
+                pos_rate = (data['sentiment'].get('positive', 0) /
+                            data['mention_count']) * 100
+                if pos_rate > 70:
+                    specific_insights.append(LOCATION_INSIGHT_TEMPLATES['positive'].format(plain_name))
+                elif pos_rate < 30:
+                    specific_insights.append(LOCATION_INSIGHT_TEMPLATES['challenging'].format(plain_name))
+
+            # 添加专属洞察
+            if specific_insights:
+                data.setdefault('insights', []).extend(specific_insights)
 
         return results
 
@@ -200,17 +264,18 @@ class LocationAnalyzer(BaseAnalyzer):
         base_insights.update(location_insights)
         return base_insights
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析使用地点
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 使用地点分析结果
         """
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加使用地点专属的洞察
         results = self._generate_location_specific_insights(results)
@@ -2,22 +2,51 @@
 购买动机分析器
 功能：分析用户购买产品的原因、决策因素和期望
 """
-from typing import Dict, Set, List, Tuple
-import spacy
-from collections import defaultdict
+import re
+import sys
+from typing import Dict, Set, List, Tuple, Optional
+from spacy.symbols import acomp, advcl, advmod, ccomp, pobj, prep
+from ..utils.keyword_matcher import KeywordMatcher
 from .base_analyzer import BaseAnalyzer
 
 
+# 依存关系使用整数 ID 比较，避免逐个 Token 查询字符串属性
+_POST_MODIFIER_DEPS = frozenset({prep, advmod, acomp})
+_CLAUSE_DEPS = frozenset({ccomp, advcl, pobj})
+
+# 引出原因从句的连词，以及可能带出原因短语的介词（按小写词形比较）
+_REASON_MARKERS = frozenset({'because', 'since', 'as'})
+_REASON_WORDS = frozenset({'for', 'to'})
+
+# 表示购买行为的词（按词形匹配）
+PURCHASE_WORDS = frozenset({
+    'buy', 'purchase', 'order', 'choose', 'select', 'decide',
+    'get', 'acquire', 'invest', 'spend', 'bought', 'ordered'
+})
+
+# 购买动机附加洞察 {结果键名: 属性名}，只写入分析过程中实际设置的属性
+PURCHASE_DRIVER_ATTRIBUTES = {
+    'primary_motivations': 'primary_motivations',
+    'decision_factors': 'decision_factors',
+    'influence_sources': 'influence_sources'
+}
+MOTIVATION_INSIGHT_ATTRIBUTES = {
+    'motivation_strength': 'motivation_scores',
+    'purchase_timing': 'timing_analysis'
+}
+
+# 上述词各种词形（含不规则变化）的共同前缀，Doc 文本中一个都不出现时不可能有购买相关的句子
+_PURCHASE_PREFILTER = re.compile(
+    r'\b(?:buy|bought|purchas|order|cho(?:o?s)|select|decid|get|got|acquir|invest|spen[dt])'
+)
+
+
 class MotivationAnalyzer(BaseAnalyzer):
+    supports_doc_extraction = True
+
     def __init__(self):
         """初始化购买动机分析器"""
         super().__init__()
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            import os
-            os.system('python -m spacy download en_core_web_sm')
-            self.nlp = spacy.load('en_core_web_sm')
 
         # 初始化购买动机相关的模式
         self.motivation_patterns = {
@@ -71,6 +100,25 @@ class MotivationAnalyzer(BaseAnalyzer):
             }
         }
 
+        # 预编译关键词匹配器，短语分类时只需扫描一次文本
+        self._motivation_matcher = KeywordMatcher(self.motivation_patterns)
+
+        # 单词到所属动机类别序号的查找表（同一单词属于多个类别时取模式中靠前的类别）
+        self._word_category = {}
+        for category_id, keywords in enumerate(
+                keywords for subcategories in self.motivation_patterns.values()
+                for keywords in subcategories.values()
+        ):
+            for keyword in keywords:
+                self._word_category.setdefault(keyword, category_id)
+
+        # 预先拆分类别名称 {类别: (主类别, 子类别)}，主类别名称本身含下划线，不能按下划线拆分
+        self._category_parts = {
+            f"{main_category}_{sub_category}": (main_category, sub_category)
+            for main_category, subcategories in self.motivation_patterns.items()
+            for sub_category in subcategories
+        }
+
     def _extract_categories(self, df) -> Dict[str, Set[str]]:
         """
         从评论中提取购买动机相关的类别和关键词
@@ -80,32 +128,40 @@ class MotivationAnalyzer(BaseAnalyzer):
         返回:
             Dict[str, Set[str]]: {动机类别: {相关关键词集合}}
         """
-        motivation_keywords = defaultdict(set)
-
-        # 分析每条评论
-        for _, row in df.iterrows():
-            text = f"{row['标题']} {row['内容']}"
-            doc = self.nlp(text.lower())
-
-            # 提取购买动机相关的短语
-            for sent in doc.sents:
-                # 分析购买相关的句子
-                if self._is_purchase_related(sent):
-                    motivation_phrases = self._extract_motivation_phrases(sent)
-
-                    # 将短语分类到相应的动机类别中
-                    for phrase, category in motivation_phrases:
-                        motivation_keywords[category].add(phrase)
-
-        # 过滤掉提及次数过少的类别
-        min_mentions = 2
-        filtered_motivations = {
-            category: keywords
-            for category, keywords in motivation_keywords.items()
-            if len(keywords) >= min_mentions
-        }
+        return self._extract_doc_categories(df)
+
+    def _category_labels(self) -> List[str]:
+        """
+        全部动机类别名称（序号与 _motivation_matcher 返回的类别序号一致）
+
+        返回:
+            List[str]: 动机类别名称列表
+        """
+        return self._motivation_matcher.labels
+
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单条评论的 Doc 中提取购买动机相关的短语
+
+        参数:
+            doc: spaCy的Doc对象
+            buckets: 按动机类别序号索引的短语列表
+        """
+        # 先按原文快速过滤：没有购买相关词的评论无需逐句计算词形
+        if not _PURCHASE_PREFILTER.search(doc.text):
+            return
+
+        # 只分析包含动机关键词片段且与购买相关的句子（动机短语都取自同一句子的依存子树），
+        # 其余句子的 Token 不再扫描
+        for sent in self._motivation_matcher.candidate_sents(doc):
+            if not self._is_purchase_related(sent):
+                continue
 
-        return filtered_motivations
+            motivation_phrases = self._extract_motivation_phrases(sent)
+
+            # 将短语分类到相应的动机类别中
+            for phrase, category in motivation_phrases:
+                buckets[category].append(sys.intern(phrase))
 
     def _is_purchase_related(self, sent) -> bool:
         """
@@ -116,36 +172,56 @@ class MotivationAnalyzer(BaseAnalyzer):
         返回:
             bool: 是否与购买相关
         """
-        purchase_words = {
-            'buy', 'purchase', 'order', 'choose', 'select', 'decide',
-            'get', 'acquire', 'invest', 'spend', 'bought', 'ordered'
-        }
-        return any(token.lemma_ in purchase_words for token in sent)
+        return any(token.lemma_ in PURCHASE_WORDS for token in sent)
 
-    def _extract_motivation_phrases(self, sent) -> List[Tuple[str, str]]:
+    def _scan_motivation_tokens(self, tokens) -> List[Tuple[int, bool, Optional[int]]]:
+        """
+        一次扫描找出需要进一步分析的 Token
+
+        参数:
+            tokens: spaCy的Span对象（句子）
+        返回:
+            List[Tuple[int, bool, Optional[int]]]: [(Token 序号, 是否可能引出原因子句, 动机类别序号)]，按序号排列
+        """
+        word_category = self._word_category
+        candidates = []
+        for token in tokens:
+            text = token.text
+            is_reason = text in _REASON_WORDS or token.lower_ in _REASON_MARKERS
+            category = word_category.get(text)
+            if is_reason or category is not None:
+                candidates.append((token.i, is_reason, category))
+        return candidates
+
+    def _extract_motivation_phrases(self, sent) -> List[Tuple[str, int]]:
         """
         从句子中提取动机相关的短语及其类别
 
         参数:
             sent: spaCy的Span对象（句子）
         返回:
-            List[Tuple[str, str]]: [(短语, 类别)]
+            List[Tuple[str, int]]: [(短语, 类别序号)]
         """
+        candidates = self._scan_motivation_tokens(sent)
+
         phrases = []
+        doc = sent.doc
 
-        # 寻找因果关系
-        for token in sent:
-            if token.dep_ in {'because', 'since', 'as'} or token.text in {'for', 'to'}:
+        # 只访问候选位置的 Token，其余 Token 不再创建对象
+        for i, is_reason, category in candidates:
+            token = doc[i]
+
+            # 寻找因果关系
+            if is_reason:
                 # 提取原因子句
                 reason_phrase = self._extract_reason_phrase(token)
                 if reason_phrase:
-                    category = self._determine_motivation_category(reason_phrase)
-                    if category:
-                        phrases.append((reason_phrase, category))
+                    reason_category = self._determine_motivation_category(reason_phrase)
+                    if reason_category is not None:
+                        phrases.append((reason_phrase, reason_category))
 
             # 检查动机相关的关键词
-            category = self._check_motivation_category(token.text)
-            if category:
+            if category is not None:
                 phrase = self._extract_descriptive_phrase(token)
                 if phrase:
                     phrases.append((phrase, category))
@@ -161,12 +237,15 @@ class MotivationAnalyzer(BaseAnalyzer):
         返回:
             str: 原因短语
         """
+        # 连词（because 等）没有子节点，它所引出的原因从句就是其中心词的子树
+        if token.lower_ in _REASON_MARKERS and token.head.dep in _CLAUSE_DEPS:
+            return ' '.join(t.text for t in token.head.subtree)
+
         # 找到从属子句
         for child in token.children:
-            if child.dep_ in {'ccomp', 'advcl', 'pobj'}:
-                # 获取子句的所有词
-                subtree = list(child.subtree)
-                return ' '.join(t.text for t in subtree)
+            if child.dep in _CLAUSE_DEPS:
+                # 获取子句的所有词（直接遍历子树，不先转成列表）
+                return ' '.join(t.text for t in child.subtree)
         return None
 
     def _extract_descriptive_phrase(self, token) -> str:
@@ -178,75 +257,55 @@ class MotivationAnalyzer(BaseAnalyzer):
         返回:
             str: 描述性短语
         """
-        phrase_parts = []
-
-        # 添加前置修饰语
-        for child in token.children:
-            if child.dep_ in {'amod', 'compound'} and child.i < token.i:
-                phrase_parts.append(child.text)
+        # 添加前置修饰语（lefts 只包含位于核心词之前的子节点）
+        phrase_parts = [child.text for child in token.lefts if child.dep in self._pre_modifier_deps]
 
         # 添加核心词
         phrase_parts.append(token.text)
 
         # 添加后置修饰语
-        for child in token.children:
-            if child.dep_ in {'prep', 'advmod', 'acomp'} and child.i > token.i:
+        for child in token.rights:
+            if child.dep in _POST_MODIFIER_DEPS:
                 # 获取整个介词短语
-                prep_phrase = [child.text]
+                phrase_parts.append(child.text)
                 for grandchild in child.children:
-                    if grandchild.dep_ == 'pobj':
-                        prep_phrase.extend(t.text for t in grandchild.subtree)
-                phrase_parts.extend(prep_phrase)
+                    if grandchild.dep == pobj:
+                        phrase_parts.extend(t.text for t in grandchild.subtree)
 
         return ' '.join(phrase_parts) if phrase_parts else None
 
-    def _determine_motivation_category(self, text: str) -> str:
+    def _determine_motivation_category(self, text: str) -> Optional[int]:
         """
         确定文本属于哪个动机类别
 
         参数:
-            text: 待分析文本
+            text: 待分析文本（小写）
         返回:
-            str: 动机类别名称
+            Optional[int]: 动机类别序号（见 _category_labels），无匹配时为 None
         """
-        for main_category, subcategories in self.motivation_patterns.items():
-            for sub_category, keywords in subcategories.items():
-                if any(keyword in text.lower() for keyword in keywords):
-                    return f"{main_category}_{sub_category}"
-        return None
+        # 短语取自已转为小写的 Doc，无需再次转换
+        return self._motivation_matcher.match_id(text)
 
-    def _check_motivation_category(self, text: str) -> str:
+    def _check_motivation_category(self, text: str) -> Optional[int]:
         """
         检查单个词属于哪个动机类别
 
         参数:
-            text: 待检查的文本
+            text: 待检查的文本（小写）
         返回:
-            str: 动机类别名称
+            Optional[int]: 动机类别序号（见 _category_labels），无匹配时为 None
         """
-        text = text.lower()
-        for main_category, subcategories in self.motivation_patterns.items():
-            for sub_category, keywords in subcategories.items():
-                if text in keywords:
-                    return f"{main_category}_{sub_category}"
-        return None
+        return self._word_category.get(text)
 
     def _generate_insights(self, trend_results: Dict) -> Dict:
         """生成动机相关的分析洞察"""
         base_insights = super()._generate_insights(trend_results)
 
-        # 添加动机特定的分析
-        motivation_insights = {
-            'purchase_drivers': {
-                'primary_motivations': getattr(self, 'primary_motivations', []),
-                'decision_factors': getattr(self, 'decision_factors', {}),
-                'influence_sources': getattr(self, 'influence_sources', {})
-            },
-            'motivation_strength': getattr(self, 'motivation_scores', {}),
-            'purchase_timing': getattr(self, 'timing_analysis', {})
-        }
-
-        base_insights.update(motivation_insights)
+        # 添加动机特定的分析（未设置的属性不写入，不再生成空的占位容器）
+        purchase_drivers = self._optional_insights(PURCHASE_DRIVER_ATTRIBUTES)
+        if purchase_drivers:
+            base_insights['purchase_drivers'] = purchase_drivers
+        base_insights.update(self._optional_insights(MOTIVATION_INSIGHT_ATTRIBUTES))
         return base_insights
 
     def _generate_motivation_specific_insights(self, results: Dict) -> Dict:
@@ -262,12 +321,10 @@ class MotivationAnalyzer(BaseAnalyzer):
             specific_insights = []
 
             # 添加安全检查
-            if '_' in category:
-                main_cat, sub_cat = category.split('_')
-            else:
-                main_cat = category
-                sub_cat = category
+            parts = self._category_parts.get(category)
+            if parts is None:
                 continue  # 跳过不符合格式的类别
+            main_cat, sub_cat = parts
 
             # 基于不同动机维度生成洞察
             if main_cat == 'problem_solving':
@@ -303,17 +360,18 @@ class MotivationAnalyzer(BaseAnalyzer):
 
         return results
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析购买动机
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 购买动机分析结果
         """
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加购买动机专属的洞察
         results = self._generate_motivation_specific_insights(results)
@@ -2,12 +2,24 @@
 使用目的分析器
 功能：分析用户使用产品的主要目的和意图
 """
-from typing import Dict, Set
-import spacy
-from collections import defaultdict
+import sys
+from functools import cached_property
+from typing import Dict, List, Set, Tuple
+from spacy.matcher import Matcher
 from .base_analyzer import BaseAnalyzer, ProcessingError
 
+# 使用目的附加洞察 {结果键名: 属性名}，只写入分析过程中实际设置的属性
+PURPOSE_INSIGHT_ATTRIBUTES = {
+    'usage_purposes': 'purpose_distribution',
+    'purpose_satisfaction': 'purpose_satisfaction',
+    'common_scenarios': 'common_scenarios'
+}
+
+
 class PurposeAnalyzer(BaseAnalyzer):
+    supports_doc_extraction = True
+    min_mentions = 3
+
     def __init__(self):
         """初始化使用目的分析器"""
         super().__init__()
@@ -32,6 +44,8 @@ class PurposeAnalyzer(BaseAnalyzer):
             }
         }
 
+        self._purpose_labels = list(self.purpose_patterns)
+
     def _extract_categories(self, df) -> Dict[str, Set[str]]:
         """
         从评论中提取使用目的相关的类别和关键词
@@ -42,62 +56,84 @@ class PurposeAnalyzer(BaseAnalyzer):
             Dict[str, Set[str]]: {目的类别: {相关关键词集合}}
         """
         try:
-            purpose_keywords = defaultdict(set)
+            return self._extract_doc_categories(df)
 
-            # 分析每条评论
-            for _, row in df.iterrows():
+        except Exception as e:
+            self.logger.error(f"Category extraction failed: {str(e)}")
+            raise ProcessingError(f"Failed to extract purpose categories: {str(e)}")
+
+    def _category_labels(self) -> List[str]:
+        """
+        全部目的类别名称
+
+        返回:
+            List[str]: 目的类别名称列表
+        """
+        return self._purpose_labels
+
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单条评论的 Doc 中提取动词-名词短语
+
+        参数:
+            doc: spaCy的Doc对象
+            buckets: 按目的类别序号索引的短语列表
+        """
+        try:
+            # 由 Matcher 一次定位所有目的动词/名词，不再逐词检查词性和查表
+            match_keys = self._purpose_match_keys
+            for match_id, start, _ in self._purpose_token_matcher(doc):
                 try:
-                    text = f"{row['标题']} {row['内容']}"
-                    doc = self.nlp(text.lower())
-
-                    # 提取动词-名词短语
-                    for token in doc:
-                        try:
-                            # 检查动词
-                            if token.pos_ == 'VERB':
-                                verb = token.lemma_
-                                # 检查这个动词属于哪个目的类别
-                                for purpose, patterns in self.purpose_patterns.items():
-                                    if verb in patterns['verbs']:
-                                        # 查找与该动词相关的名词
-                                        for child in token.children:
-                                            if child.pos_ == 'NOUN':
-                                                phrase = f"{verb} {child.text}"
-                                                purpose_keywords[purpose].add(phrase)
-
-                            # 检查名词
-                            elif token.pos_ == 'NOUN':
-                                noun = token.lemma_
-                                # 检查这个名词属于哪个目的类别
-                                for purpose, patterns in self.purpose_patterns.items():
-                                    if noun in patterns['nouns']:
-                                        # 添加相关的形容词修饰语
-                                        for child in token.children:
-                                            if child.pos_ == 'ADJ':
-                                                phrase = f"{child.text} {noun}"
-                                                purpose_keywords[purpose].add(phrase)
-
-                        except Exception as e:
-                            self.logger.warning(f"Error processing token: {str(e)}")
-                            continue
+                    purpose_id, is_verb = match_keys[match_id]
+                    token = doc[start]
+                    word = token.lemma_
+
+                    if is_verb:
+                        # 查找与该动词相关的名词
+                        for child in token.children:
+                            if child.pos_ == 'NOUN':
+                                buckets[purpose_id].append(sys.intern(f"{word} {child.text}"))
+                    else:
+                        # 添加相关的形容词修饰语
+                        for child in token.children:
+                            if child.pos_ == 'ADJ':
+                                buckets[purpose_id].append(sys.intern(f"{child.text} {word}"))
 
                 except Exception as e:
-                    self.logger.warning(f"Error processing row: {str(e)}")
+                    self.logger.warning(f"Error processing token: {str(e)}")
                     continue
 
-            # 过滤掉提及次数过少的类别
-            min_mentions = 3
-            filtered_purposes = {
-                purpose: keywords
-                for purpose, keywords in purpose_keywords.items()
-                if len(keywords) >= min_mentions
-            }
+        except Exception as e:
+            self.logger.warning(f"Error processing row: {str(e)}")
 
-            return filtered_purposes
+    @cached_property
+    def _purpose_token_matcher(self) -> Matcher:
+        """
+        按词形和词性匹配所有目的动词/名词的 Matcher（首次使用时构建）
 
-        except Exception as e:
-            self.logger.error(f"Category extraction failed: {str(e)}")
-            raise ProcessingError(f"Failed to extract purpose categories: {str(e)}")
+        返回:
+            Matcher: 每个目的类别对应一个动词规则和一个名词规则
+        """
+        matcher = Matcher(self.nlp.vocab)
+        for purpose, patterns in self.purpose_patterns.items():
+            matcher.add(f"{purpose}_VERB", [[{'LEMMA': {'IN': sorted(patterns['verbs'])}, 'POS': 'VERB'}]])
+            matcher.add(f"{purpose}_NOUN", [[{'LEMMA': {'IN': sorted(patterns['nouns'])}, 'POS': 'NOUN'}]])
+        return matcher
+
+    @cached_property
+    def _purpose_match_keys(self) -> Dict[int, Tuple[int, bool]]:
+        """
+        Matcher 规则 ID 到 (目的类别序号, 是否为动词规则) 的查找表
+
+        返回:
+            Dict[int, Tuple[int, bool]]: {规则 ID: (目的类别序号, 是否为动词规则)}
+        """
+        strings = self.nlp.vocab.strings
+        return {
+            strings.add(f"{purpose}_{pos}"): (purpose_id, pos == 'VERB')
+            for purpose_id, purpose in enumerate(self.purpose_patterns)
+            for pos in ('VERB', 'NOUN')
+        }
 
     def _generate_purpose_specific_insights(self, results: Dict) -> Dict:
         """
@@ -145,27 +181,22 @@ class PurposeAnalyzer(BaseAnalyzer):
         """生成目的相关的分析洞察"""
         base_insights = super()._generate_insights(trend_results)
 
-        # 添加目的特定的分析
-        purpose_insights = {
-            'usage_purposes': getattr(self, 'purpose_distribution', {}),
-            'purpose_satisfaction': getattr(self, 'purpose_satisfaction', {}),
-            'common_scenarios': getattr(self, 'common_scenarios', [])
-        }
-
-        base_insights.update(purpose_insights)
+        # 添加目的特定的分析（未设置的属性不写入，不再生成空的占位容器）
+        base_insights.update(self._optional_insights(PURPOSE_INSIGHT_ATTRIBUTES))
         return base_insights
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析使用目的
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 使用目的分析结果
         """
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加使用目的专属的洞察
         results = self._generate_purpose_specific_insights(results)
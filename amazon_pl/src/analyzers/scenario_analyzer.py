@@ -2,22 +2,34 @@
 使用场景分析器
 功能：分析用户在什么场景下使用产品，包括具体情境、活动类型和环境条件
 """
-from typing import Dict, Set, List, Tuple
-import spacy
-from collections import defaultdict
+import sys
+from typing import Dict, Set, List, Tuple, Optional
+from spacy.symbols import ADJ, NOUN, advmod, pobj, prep
+from ..utils.keyword_matcher import KeywordMatcher
 from .base_analyzer import BaseAnalyzer
 
+# 词性与依存关系使用整数 ID 比较，避免逐个 Token 查询字符串属性
+_DESCRIPTION_POS = frozenset({NOUN, ADJ})
+_POST_MODIFIER_DEPS = frozenset({prep, advmod})
+
+# 引出时间、地点短语的介词与连词
+_SCENARIO_PREPS = frozenset({'in', 'at', 'during', 'while', 'when'})
+
+# 使用场景附加洞察 {结果键名: 属性名}，只写入分析过程中实际设置的属性
+SCENARIO_INSIGHT_ATTRIBUTES = {
+    'activity_patterns': 'activity_distribution',
+    'environment_usage': 'environment_distribution',
+    'condition_impact': 'condition_impact',
+    'common_scenarios': 'frequent_scenarios'
+}
+
 
 class ScenarioAnalyzer(BaseAnalyzer):
+    supports_doc_extraction = True
+
     def __init__(self):
         """初始化使用场景分析器"""
         super().__init__()
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            import os
-            os.system('python -m spacy download en_core_web_sm')
-            self.nlp = spacy.load('en_core_web_sm')
 
         # 初始化场景相关的模式
         self.scenario_patterns = {
@@ -65,6 +77,16 @@ class ScenarioAnalyzer(BaseAnalyzer):
             }
         }
 
+        # 预编译关键词匹配器，短语分类时只需扫描一次文本
+        self._scenario_matcher = KeywordMatcher(self.scenario_patterns)
+
+        # 预先拆分类别名称 {类别: (主类别, 子类别)}，主类别和子类别名称本身都可能含下划线
+        self._category_parts = {
+            f"{main_category}_{sub_category}": (main_category, sub_category)
+            for main_category, subcategories in self.scenario_patterns.items()
+            for sub_category in subcategories
+        }
+
     def _extract_categories(self, df) -> Dict[str, Set[str]]:
         """
         从评论中提取场景相关的类别和关键词
@@ -74,57 +96,59 @@ class ScenarioAnalyzer(BaseAnalyzer):
         返回:
             Dict[str, Set[str]]: {场景类别: {相关关键词集合}}
         """
-        scenario_keywords = defaultdict(set)
-
-        # 分析每条评论
-        for _, row in df.iterrows():
-            text = f"{row['标题']} {row['内容']}"
-            doc = self.nlp(text.lower())
-
-            # 提取场景相关的短语
-            for sent in doc.sents:
-                scenario_phrases = self._extract_scenario_phrases(sent)
-
-                # 将短语分类到相应的场景类别中
-                for phrase, category in scenario_phrases:
-                    scenario_keywords[category].add(phrase)
-
-        # 过滤掉提及次数过少的类别
-        min_mentions = 2
-        filtered_scenarios = {
-            category: keywords
-            for category, keywords in scenario_keywords.items()
-            if len(keywords) >= min_mentions
-        }
+        return self._extract_doc_categories(df)
+
+    def _category_labels(self) -> List[str]:
+        """
+        全部场景类别名称（序号与 _scenario_matcher 返回的类别序号一致）
 
-        return filtered_scenarios
+        返回:
+            List[str]: 场景类别名称列表
+        """
+        return self._scenario_matcher.labels
+
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单条评论的 Doc 中提取场景相关的短语
+
+        参数:
+            doc: spaCy的Doc对象
+            buckets: 按场景类别序号索引的短语列表
+        """
+        # 整篇评论只扫描一次关键词片段，没有任何片段的句子中的短语都不会归入场景类别，跳过逐词分析
+        for sent in self._scenario_matcher.candidate_sents(doc):
+            scenario_phrases = self._extract_scenario_phrases(sent)
+
+            # 将短语分类到相应的场景类别中
+            for phrase, category in scenario_phrases:
+                buckets[category].append(sys.intern(phrase))
 
-    def _extract_scenario_phrases(self, sent) -> List[Tuple[str, str]]:
+    def _extract_scenario_phrases(self, sent) -> List[Tuple[str, int]]:
         """
         从句子中提取场景相关的短语及其类别
 
         参数:
             sent: spaCy的Span对象（句子）
         返回:
-            List[Tuple[str, str]]: [(短语, 类别)]
+            List[Tuple[str, int]]: [(短语, 类别序号)]
         """
         phrases = []
 
         # 检查时间和地点相关的介词短语
         for token in sent:
-            if token.dep_ == 'prep' and token.text in {'in', 'at', 'during', 'while', 'when'}:
+            if token.dep == prep and token.text in _SCENARIO_PREPS:
                 scenario_phrase = self._extract_prep_phrase(token)
                 if scenario_phrase:
                     category = self._determine_scenario_category(scenario_phrase)
-                    if category:
+                    if category is not None:
                         phrases.append((scenario_phrase, category))
 
             # 检查场景描述词
-            elif token.pos_ in {'NOUN', 'ADJ'}:
+            elif token.pos in _DESCRIPTION_POS:
                 scenario_phrase = self._extract_scenario_description(token)
                 if scenario_phrase:
                     category = self._determine_scenario_category(scenario_phrase)
-                    if category:
+                    if category is not None:
                         phrases.append((scenario_phrase, category))
 
         return phrases
@@ -142,10 +166,10 @@ class ScenarioAnalyzer(BaseAnalyzer):
 
         # 添加介词的宾语及其修饰语
         for child in token.children:
-            if child.dep_ == 'pobj':
+            if child.dep == pobj:
                 # 添加宾语的修饰语
                 for grandchild in child.children:
-                    if grandchild.dep_ in {'amod', 'compound'} and grandchild.i < child.i:
+                    if grandchild.dep in self._pre_modifier_deps and grandchild.i < child.i:
                         phrase_parts.append(grandchild.text)
 
                 # 添加宾语
@@ -153,7 +177,7 @@ class ScenarioAnalyzer(BaseAnalyzer):
 
                 # 添加后置修饰语
                 for grandchild in child.children:
-                    if grandchild.dep_ in {'prep', 'advmod'} and grandchild.i > child.i:
+                    if grandchild.dep in _POST_MODIFIER_DEPS and grandchild.i > child.i:
                         phrase_parts.extend(t.text for t in grandchild.subtree)
 
         return ' '.join(phrase_parts) if len(phrase_parts) > 1 else None
@@ -171,7 +195,7 @@ class ScenarioAnalyzer(BaseAnalyzer):
 
         # 添加前置修饰语
         for child in token.children:
-            if child.dep_ in {'amod', 'compound'} and child.i < token.i:
+            if child.dep in self._pre_modifier_deps and child.i < token.i:
                 description_parts.append(child.text)
 
         # 添加核心词
@@ -179,40 +203,29 @@ class ScenarioAnalyzer(BaseAnalyzer):
 
         # 添加后置修饰语
         for child in token.children:
-            if child.dep_ in {'prep', 'advmod'} and child.i > token.i:
+            if child.dep in _POST_MODIFIER_DEPS and child.i > token.i:
                 description_parts.extend(t.text for t in child.subtree)
 
         return ' '.join(description_parts) if description_parts else None
 
-    def _determine_scenario_category(self, text: str) -> str:
+    def _determine_scenario_category(self, text: str) -> Optional[int]:
         """
         确定场景描述属于哪个类别
 
         参数:
-            text: 场景描述文本
+            text: 场景描述文本（小写）
         返回:
-            str: 场景类别名称
+            Optional[int]: 场景类别序号（见 _category_labels），无匹配时为 None
         """
-        text = text.lower()
-        for main_category, subcategories in self.scenario_patterns.items():
-            for sub_category, keywords in subcategories.items():
-                if any(keyword in text for keyword in keywords):
-                    return f"{main_category}_{sub_category}"
-        return None
+        # 短语取自已转为小写的 Doc，无需再次转换
+        return self._scenario_matcher.match_id(text)
 
     def _generate_insights(self, trend_results: Dict) -> Dict:
         """生成场景相关的分析洞察"""
         base_insights = super()._generate_insights(trend_results)
 
-        # 添加场景特定的分析
-        scenario_insights = {
-            'activity_patterns': getattr(self, 'activity_distribution', {}),
-            'environment_usage': getattr(self, 'environment_distribution', {}),
-            'condition_impact': getattr(self, 'condition_impact', {}),
-            'common_scenarios': getattr(self, 'frequent_scenarios', [])
-        }
-
-        base_insights.update(scenario_insights)
+        # 添加场景特定的分析（未设置的属性不写入，不再生成空的占位容器）
+        base_insights.update(self._optional_insights(SCENARIO_INSIGHT_ATTRIBUTES))
         return base_insights
 
     def _generate_scenario_specific_insights(self, results: Dict) -> Dict:
@@ -232,13 +245,8 @@ class ScenarioAnalyzer(BaseAnalyzer):
             specific_insights = []
 
             try:
-                # 安全地分解类别名称
-                if '_' in category:
-                    main_cat, sub_cat = category.split('_', 1)  # 只分割第一个下划线
-                else:
-                    # 如果没有下划线，将整个类别作为 main_cat
-                    main_cat = category
-                    sub_cat = ''
+                # 安全地分解类别名称，未知类别将整个类别作为 main_cat
+                main_cat, sub_cat = self._category_parts.get(category, (category, ''))
 
                 # 基于不同场景维度生成洞察
                 if data.get('percentage', 0) > 15:
@@ -270,17 +278,18 @@ class ScenarioAnalyzer(BaseAnalyzer):
 
         return results
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析使用场景
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 使用场景分析结果
         """
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加使用场景专属的洞察
         results = self._generate_scenario_specific_insights(results)
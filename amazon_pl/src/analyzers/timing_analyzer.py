@@ -9,6 +9,13 @@ from datetime import datetime
 from .base_analyzer import BaseAnalyzer, ProcessingError
 
 
+# 时间模式维度对应的类别名称前缀
+TIMING_CATEGORY_PREFIXES = {
+    'time_of_day': 'time',
+    'frequency': 'frequency',
+    'duration': 'duration'
+}
+
 
 class TimingAnalyzer(BaseAnalyzer):
     def __init__(self):
@@ -36,6 +43,14 @@ class TimingAnalyzer(BaseAnalyzer):
             }
         }
 
+        # 关键词到所属类别的倒排索引，每个词只需查一次表（一个词可属于多个类别）
+        self._pattern_index = {}
+        for dimension, groups in self.timing_patterns.items():
+            prefix = TIMING_CATEGORY_PREFIXES[dimension]
+            for name, keywords in groups.items():
+                for keyword in keywords:
+                    self._pattern_index[keyword] = self._pattern_index.get(keyword, ()) + (f"{prefix}_{name}",)
+
     def _extract_categories(self, df) -> Dict[str, Set[str]]:
         """
         从评论中提取时间相关的类别和关键词
@@ -48,37 +63,23 @@ class TimingAnalyzer(BaseAnalyzer):
         try:
             timing_keywords = defaultdict(set)
 
-            # 分析每条评论
-            for _, row in df.iterrows():
+            # 时间模式只按词文本匹配，上下文也只取相邻的词，因此只需分词，不运行词性、依存等组件
+            texts = self._iter_review_texts(df)
+            pattern_index = self._pattern_index
+            for doc in self.nlp.tokenizer.pipe(texts, batch_size=self.nlp_batch_size):
                 try:
-                    text = f"{row['标题']} {row['内容']}"
-                    doc = self.nlp(text.lower())
-
-                    # 提取时间相关的短语
-                    for sent in doc.sents:
-                        # 检查每个词是否匹配时间模式
-                        for token in sent:
-                            try:
-                                # 检查时间点
-                                for time_category, patterns in self.timing_patterns['time_of_day'].items():
-                                    if token.text in patterns:
-                                        context = self._extract_context(token)
-                                        timing_keywords[f"time_{time_category}"].add(context)
-
-                                # 检查频率
-                                for freq_category, patterns in self.timing_patterns['frequency'].items():
-                                    if token.text in patterns:
-                                        context = self._extract_context(token)
-                                        timing_keywords[f"frequency_{freq_category}"].add(context)
-
-                                # 检查持续时间
-                                for dur_category, patterns in self.timing_patterns['duration'].items():
-                                    if token.text in patterns:
-                                        context = self._extract_context(token)
-                                        timing_keywords[f"duration_{dur_category}"].add(context)
-                            except Exception as e:
-                                self.logger.warning(f"Error processing token: {str(e)}")
-                                continue
+                    # 检查每个词是否匹配时间模式
+                    for token in doc:
+                        try:
+                            # 时间点、频率、持续时间的关键词一次查表
+                            categories = pattern_index.get(token.text)
+                            if categories:
+                                context = self._extract_context(token)
+                                for category in categories:
+                                    timing_keywords[category].add(context)
+                        except Exception as e:
+                            self.logger.warning(f"Error processing token: {str(e)}")
+                            continue
 
                 except Exception as e:
                     self.logger.warning(f"Error processing row: {str(e)}")
@@ -108,10 +109,11 @@ class TimingAnalyzer(BaseAnalyzer):
         返回:
             str: 上下文短语
         """
-        start = max(0, token.i - window_size)
-        end = min(len(token.doc), token.i + window_size + 1)
-        context_tokens = token.doc[start:end]
-        return ' '.join([t.text for t in context_tokens])
+        doc = token.doc
+        first = doc[max(0, token.i - window_size)]
+        last = doc[min(len(doc) - 1, token.i + window_size)]
+        # 直接截取原文，不再逐个收集 Token 文本再拼接
+        return doc.text[first.idx:last.idx + len(last)]
 
     def _generate_timing_specific_insights(self, results: Dict) -> Dict:
         """
@@ -183,17 +185,18 @@ class TimingAnalyzer(BaseAnalyzer):
         base_insights.update(timing_insights)
         return base_insights
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析使用时刻
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 使用时刻分析结果
         """
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加使用时刻专属的洞察
         results = self._generate_timing_specific_insights(results)
@@ -2,14 +2,32 @@
 用户特征分析器
 功能：分析用户的特征，包括用户类型、使用习惯、专业程度等
 """
+import sys
 import pandas as pd
-from typing import Dict, Set, List, Tuple
+from typing import Dict, Set, List, Tuple, Optional
 import spacy
-from collections import defaultdict
+from spacy.symbols import ADJ, NOUN, VERB, advmod, prep
+from ..utils.keyword_matcher import KeywordMatcher
 from .base_analyzer import BaseAnalyzer, ProcessingError
 
 
+# 第一人称代词（文本已转为小写）
+FIRST_PERSON_WORDS = frozenset({'i', 'we', 'my', 'our'})
+
+# 词性与依存关系使用整数 ID 比较，避免逐个 Token 查询字符串属性
+_DESCRIPTION_POS = frozenset({ADJ, NOUN})
+_POST_MODIFIER_DEPS = frozenset({prep, advmod})
+
+# 表示使用行为的动词（按词形匹配）与引出时间短语的介词
+_USE_LEMMAS = frozenset({'use', 'utilize', 'operate', 'work'})
+_TIME_PREPS = frozenset({'for', 'since', 'during'})
+
+
 class UserAnalyzer(BaseAnalyzer):
+    required_columns = BaseAnalyzer.required_columns + ('用户ID',)
+    supports_doc_extraction = True
+    min_mentions = 2
+
     def __init__(self):
         """初始化用户特征分析器"""
         super().__init__()
@@ -63,6 +81,9 @@ class UserAnalyzer(BaseAnalyzer):
             }
         }
 
+        # 预编译关键词匹配器，分类时只需扫描一次文本
+        self._user_matcher = KeywordMatcher(self.user_patterns)
+
     def _analyze_sentiment(self, df: pd.DataFrame, mention_results: Dict = None) -> Dict:
         """分析情感倾向"""
         try:
@@ -73,25 +94,19 @@ class UserAnalyzer(BaseAnalyzer):
                 for category, mentions in mention_results.items():
                     # 使用 indices 而不是 comment_ids
                     if 'indices' in mentions and mentions['indices']:
-                        category_comments = df.loc[mentions['indices']]
-                        if not category_comments.empty:
-                            sentiment_scores = [
-                                self.sentiment_analyzer.analyze_sentiment(text)['polarity']
-                                for text in category_comments['内容'].tolist()
-                            ]
+                        # 均值直接在 NumPy 数组上计算，只在写入结果时转换为列表
+                        sentiment_scores = self._polarity.loc[mentions['indices']].to_numpy()
+                        if sentiment_scores.size:
                             sentiment_results[category] = {
-                                'sentiment_scores': sentiment_scores,
-                                'average_sentiment': sum(sentiment_scores) / len(sentiment_scores)
+                                'sentiment_scores': sentiment_scores.tolist(),
+                                'average_sentiment': float(sentiment_scores.mean())
                             }
 
             # 分析整体情感
-            all_sentiments = [
-                self.sentiment_analyzer.analyze_sentiment(text)['polarity']
-                for text in df['内容'].tolist()
-            ]
+            all_sentiments = self._polarity.to_numpy()
             sentiment_results['overall'] = {
-                'sentiment_scores': all_sentiments,
-                'average_sentiment': sum(all_sentiments) / len(all_sentiments)
+                'sentiment_scores': all_sentiments.tolist(),
+                'average_sentiment': float(all_sentiments.mean()) if all_sentiments.size else 0.0
             }
 
             return sentiment_results
@@ -110,84 +125,79 @@ class UserAnalyzer(BaseAnalyzer):
             Dict[str, Set[str]]: {特征类别: {相关关键词集合}}
         """
         try:
-            user_keywords = defaultdict(set)
+            return self._extract_doc_categories(df)
 
-            # 分析每条评论
-            for _, row in df.iterrows():
-                try:
-                    # 确保文本字段是字符串类型
-                    title = str(row.get('标题', ''))
-                    content = str(row.get('内容', ''))
-                    text = f"{title} {content}"
-                    doc = self.nlp(text.lower())
-
-                    # 提取用户特征相关的短语
-                    for sent in doc.sents:
-                        try:
-                            user_phrases = self._extract_user_phrases(sent)
-                            for phrase, category in user_phrases:
-                                # 确保 category 和 phrase 都是字符串
-                                category_str = str(category)
-                                phrase_str = str(phrase)
-
-                                # 如果类别是复合的，将其转换为单个字符串
-                                if isinstance(category, (list, tuple)):
-                                    category_str = '_'.join(map(str, category))
-
-                                user_keywords[category_str].add(phrase_str)
-                        except Exception as e:
-                            self.logger.warning(f"Error processing sentence: {str(e)}")
-                            continue
+        except Exception as e:
+            self.logger.error(f"Category extraction failed: {str(e)}")
+            raise ProcessingError(f"Failed to extract user categories: {str(e)}")
 
-                except Exception as e:
-                    self.logger.warning(f"Error processing row: {str(e)}")
-                    continue
+    def _category_labels(self) -> List[str]:
+        """
+        全部用户特征类别名称（序号与 _user_matcher 返回的类别序号一致）
 
-            # 过滤掉提及次数过少的类别
-            min_mentions = 2
-            filtered_features = {
-                str(category): {str(keyword) for keyword in keywords}
-                for category, keywords in user_keywords.items()
-                if len(keywords) >= min_mentions
-            }
+        返回:
+            List[str]: 用户特征类别名称列表
+        """
+        return self._user_matcher.labels
 
-            return filtered_features
+    def _extract_from_doc(self, doc, buckets: List[List[str]]) -> None:
+        """
+        从单条评论的 Doc 中提取用户特征相关的短语
+
+        参数:
+            doc: spaCy的Doc对象
+            buckets: 按用户特征类别序号索引的短语列表
+        """
+        try:
+            for sent in doc.sents:
+                try:
+                    for phrase, category in self._extract_user_phrases(sent):
+                        buckets[category].append(sys.intern(phrase))
+                except Exception as e:
+                    self.logger.warning(f"Error processing sentence: {str(e)}")
+                    continue
 
         except Exception as e:
-            self.logger.error(f"Category extraction failed: {str(e)}")
-            raise ProcessingError(f"Failed to extract user categories: {str(e)}")
+            self.logger.warning(f"Error processing row: {str(e)}")
 
-    def _extract_user_phrases(self, sent) -> List[Tuple[str, str]]:
+    def _extract_user_phrases(self, sent) -> List[Tuple[str, int]]:
         """
         从句子中提取用户特征相关的短语及其类别
 
         参数:
             sent: spaCy的Span对象（句子）
         返回:
-            List[Tuple[str, str]]: [(短语, 类别)]
+            List[Tuple[str, int]]: [(短语, 类别序号)]
         """
         phrases = []
 
-        # 检查是否包含第一人称代词
-        has_first_person = any(token.text in {'i', 'we', 'my', 'our'} for token in sent)
-
+        # 一次遍历句子：检查是否包含第一人称代词，同时收集形容词、名词和动词
+        has_first_person = False
+        candidates = []
         for token in sent:
+            if not has_first_person and token.text in FIRST_PERSON_WORDS:
+                has_first_person = True
+            pos = token.pos
+            if pos in _DESCRIPTION_POS or pos == VERB:
+                candidates.append((token, pos))
+
+        for token, pos in candidates:
             # 如果句子包含第一人称，更可能是用户自我描述
             if has_first_person:
                 # 检查形容词和名词搭配
-                if token.pos_ in {'ADJ', 'NOUN'}:
+                if pos in _DESCRIPTION_POS:
                     user_phrase = self._extract_user_description(token)
                     if user_phrase:
                         category = self._determine_user_category(user_phrase)
-                        if category:
+                        if category is not None:
                             phrases.append((user_phrase, category))
 
             # 检查动词短语，表示使用习惯
-            if token.pos_ == 'VERB':
+            if pos == VERB:
                 usage_phrase = self._extract_usage_pattern(token)
                 if usage_phrase:
                     category = self._determine_user_category(usage_phrase)
-                    if category:
+                    if category is not None:
                         phrases.append((usage_phrase, category))
 
         return phrases
@@ -205,7 +215,7 @@ class UserAnalyzer(BaseAnalyzer):
 
         # 添加前置修饰语
         for child in token.children:
-            if child.dep_ in {'amod', 'compound'} and child.i < token.i:
+            if child.dep in self._pre_modifier_deps and child.i < token.i:
                 description_parts.append(child.text)
 
         # 添加核心词
@@ -213,7 +223,7 @@ class UserAnalyzer(BaseAnalyzer):
 
         # 添加后置修饰语
         for child in token.children:
-            if child.dep_ in {'prep', 'advmod'} and child.i > token.i:
+            if child.dep in _POST_MODIFIER_DEPS and child.i > token.i:
                 description_parts.extend(t.text for t in child.subtree)
 
         return ' '.join(description_parts) if description_parts else None
@@ -227,7 +237,7 @@ class UserAnalyzer(BaseAnalyzer):
         返回:
             str: 使用习惯短语
         """
-        if token.lemma_ in {'use', 'utilize', 'operate', 'work'}:
+        if token.lemma_ in _USE_LEMMAS:
             pattern_parts = [token.text]
 
             # 添加频率副词
@@ -236,27 +246,22 @@ class UserAnalyzer(BaseAnalyzer):
                     pattern_parts.append(child.text)
 
                 # 添加时间相关的介词短语
-                elif child.dep_ == 'prep' and child.text in {'for', 'since', 'during'}:
+                elif child.dep_ == 'prep' and child.text in _TIME_PREPS:
                     pattern_parts.extend(t.text for t in child.subtree)
 
             return ' '.join(pattern_parts) if len(pattern_parts) > 1 else None
         return None
 
-    def _determine_user_category(self, text: str) -> str:
+    def _determine_user_category(self, text: str) -> Optional[int]:
         """
         确定用户特征描述属于哪个类别
 
         参数:
             text: 用户特征描述文本
         返回:
-            str: 特征类别名称
+            Optional[int]: 特征类别序号（见 _category_labels），无匹配时为 None
         """
-        text = text.lower()
-        for main_category, subcategories in self.user_patterns.items():
-            for sub_category, keywords in subcategories.items():
-                if any(keyword in text for keyword in keywords):
-                    return f"{main_category}_{sub_category}"
-        return None
+        return self._user_matcher.match_id(text.lower())
 
     def _generate_user_specific_insights(self, results: Dict) -> Dict:
         """
@@ -305,12 +310,13 @@ class UserAnalyzer(BaseAnalyzer):
 
         return results
 
-    def analyze(self, df) -> Dict:
+    def analyze(self, df, categories: Dict[str, Set[str]] = None) -> Dict:
         """
         分析用户特征
 
         参数:
             df: 评论数据DataFrame
+            categories: 已提取好的类别（可选），提供时跳过类别提取
         返回:
             Dict: 用户特征分析结果
         """
@@ -318,7 +324,7 @@ class UserAnalyzer(BaseAnalyzer):
         self.df = df
 
         # 使用基础分析流程
-        results = super().analyze(df)
+        results = super().analyze(df, categories)
 
         # 添加用户特征专属的洞察
         results = self._generate_user_specific_insights(results)
@@ -2,15 +2,39 @@
 数据预处理模块
 功能：清洗和标准化评论数据，为后续分析做准备
 """
+import logging
+import multiprocessing
+import os
 import pandas as pd
 import numpy as np
 import re
-import spacy
-from typing import Dict, List
-from textblob import TextBlob
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterator, List, Set, Tuple
+from .analyzers._spacy_cache import gpu_requested, load_nlp, use_gpu
+from .utils.sentiment_analyzer import _text_polarity
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+# 加载时转换为 Arrow 字符串类型的文本列
+TEXT_COLUMNS = ('评论人', '标题', '内容')
+
+# 'string[pyarrow]' 类型需要 pandas 1.3 及以上版本
+_PANDAS_SUPPORTS_ARROW_STRINGS = tuple(
+    int(part) for part in re.findall(r'\d+', pd.__version__)[:2]
+) >= (1, 3)
+
+# 数据文件必须包含的列
+REQUIRED_COLUMNS = frozenset({'评论人', '内容', '评论时间'})
+
+# 判断重复评论所依据的列：同一评论人的相同内容视为同一条评论
+DEDUP_COLUMNS = ['评论人', '内容']
+
+# load_data 分块读取 CSV 时每块的行数
+CSV_CHUNKSIZE = 100_000
+
 # 添加异常类定义
 class DataProcessingError(Exception):
     """数据处理过程中的异常"""
@@ -18,14 +42,20 @@ class DataProcessingError(Exception):
 
 
 class DataProcessor:
-    def __init__(self):
-        """初始化数据处理器"""
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-        except OSError:
-            import os
-            os.system('python -m spacy download en_core_web_sm')
-            self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, parallel: bool = True):
+        """
+        初始化数据处理器
+
+        参数:
+            parallel: 数据量较大时是否使用多进程解析（GPU 或 Windows 下出现问题时可关闭）
+        """
+        # 关键词提取只需词性和依存句法，与分析器共享同一个已加载的模型
+        self.nlp = load_nlp('en_core_web_sm', disable=('ner',))
+
+        # 批量解析的每批文本数，与分析器使用相同的环境变量
+        self.nlp_batch_size = int(os.getenv('SPACY_BATCH_SIZE', '512' if gpu_requested() else '128'))
+        self.parallel = parallel
+        self.nlp_multiprocess_threshold = 2000  # 文本数达到该值时启用多进程
 
         # 加载停用词
         self.stop_words = set(self.nlp.Defaults.stop_words)
@@ -42,6 +72,23 @@ class DataProcessor:
             # 可以根据需要添加更多
         }
 
+        # 预编译文本清洗使用的正则表达式
+        # 拼写修正合并为一个正则，一次扫描完成全部替换
+        self._spelling_pattern = re.compile(
+            r'\b(' + '|'.join(map(re.escape, self.spelling_corrections)) + r')\b'
+        )
+        self._url_pattern = re.compile(r'http\S+|www.\S+')
+        self._email_pattern = re.compile(r'\S+@\S+')
+        self._whitespace_pattern = re.compile(r'\s+')
+        # 与 isalnum()/isspace() 的判断一致：\w 等价于字母数字加下划线，因此下划线需单独去除
+        self._unwanted_char_pattern = re.compile(
+            r'[^\w\s' + re.escape(''.join(sorted(self.keep_punctuation))) + r']|_'
+        )
+        # 上述模式会删除的 ASCII 字符，纯 ASCII 文本改用 bytes.translate 在 C 层一次删除
+        self._ascii_unwanted_bytes = bytes(
+            c for c in range(128) if self._unwanted_char_pattern.match(chr(c))
+        )
+
     def load_data(self, file_path: str, nrows: int = None) -> pd.DataFrame:
         """
         加载数据文件
@@ -55,33 +102,233 @@ class DataProcessor:
         try:
             # 根据文件类型读取数据
             if file_path.endswith('.xlsx'):
-                df = pd.read_excel(file_path, nrows=nrows)
+                df = self._read_excel(file_path, nrows=nrows)
             elif file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, nrows=nrows)
+                df = self._read_csv(file_path, nrows=nrows)
             else:
                 raise DataProcessingError("Unsupported file format")
 
             # 确保必要的列存在
-            required_columns = {'评论人', '内容', '评论时间'}  # 修改这里，将'评论日期'改为'评论时间'
-            missing_columns = required_columns - set(df.columns)
+            missing_columns = REQUIRED_COLUMNS - set(df.columns)
             if missing_columns:
                 raise ValueError(f"数据文件缺少必要的列: {missing_columns}")
 
-            # 删除完全重复的行
-            df = df.drop_duplicates()
+            df = self._use_arrow_strings(df)
+
+            # 删除重复的评论（只比较评论人和内容，不再逐列哈希所有列）
+            df = df.drop_duplicates(subset=DEDUP_COLUMNS)
 
             # 重置索引
             df = df.reset_index(drop=True)
 
             # 打印加载信息
-            print(f"成功加载 {len(df)} 条评论数据")
-            print(f"数据列: {df.columns.tolist()}")
+            logger.info("成功加载 %d 条评论数据", len(df))
+            logger.info("数据列: %s", df.columns.tolist())
 
             return df
 
+        except DataProcessingError:
+            raise
         except Exception as e:
             raise DataProcessingError(f"加载数据文件时出错: {str(e)}")
 
+    def iter_data(
+            self,
+            file_path: str,
+            chunksize: int = 50_000,
+            nrows: int = None
+        ) -> Iterator[pd.DataFrame]:
+        """
+        分块加载数据文件，逐块产出，避免一次性载入整个文件
+
+        参数:
+            file_path: 文件路径
+            chunksize: 每块的行数
+            nrows: 要读取的行数（可选，用于测试）
+        返回:
+            Iterator[pd.DataFrame]: 数据块迭代器
+        """
+        try:
+            # 根据文件类型读取数据；Excel 经 Parquet 缓存按批读取
+            if file_path.endswith(('.xlsx', '.xls')):
+                chunks = self._iter_excel(file_path, chunksize, nrows)
+            elif file_path.endswith('.csv'):
+                chunks = pd.read_csv(file_path, nrows=nrows, chunksize=chunksize)
+            else:
+                raise DataProcessingError("Unsupported file format")
+
+            # 跨块去重：按原值记录已出现的 (评论人, 内容)，与 load_data 的 drop_duplicates 结果一致
+            seen = set()
+            total = 0
+            for chunk in chunks:
+                missing_columns = REQUIRED_COLUMNS - set(chunk.columns)
+                if missing_columns:
+                    raise ValueError(f"数据文件缺少必要的列: {missing_columns}")
+
+                # 块内和跨块的重复评论都只保留第一次出现的行
+                mask = np.fromiter(
+                    (self._first_occurrence(key, seen) for key in zip(*(chunk[c] for c in DEDUP_COLUMNS))),
+                    dtype=bool,
+                    count=len(chunk)
+                )
+
+                chunk = self._use_arrow_strings(chunk[mask].reset_index(drop=True))
+                total += len(chunk)
+                if not chunk.empty:
+                    yield chunk
+
+            logger.info("成功加载 %d 条评论数据", total)
+
+        except DataProcessingError:
+            raise
+        except Exception as e:
+            raise DataProcessingError(f"加载数据文件时出错: {str(e)}")
+
+    @staticmethod
+    def _first_occurrence(key: Tuple, seen: Set[Tuple]) -> bool:
+        """
+        判断去重键是否第一次出现，并记录到 seen 中
+
+        参数:
+            key: 去重列的值
+            seen: 已出现的去重键集合
+        返回:
+            bool: 是否第一次出现
+        """
+        # 缺失值统一为 None，与 drop_duplicates 一样视为相同的值
+        key = tuple(None if pd.isna(value) else value for value in key)
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    def _read_csv(self, file_path: str, nrows: int = None) -> pd.DataFrame:
+        """
+        分块读取 CSV，每块读入后立即将文本列转换为 Arrow 字符串类型再合并
+
+        对象类型（每个单元格一个 Python 字符串）的文本列同一时间只存在一块，
+        不再整表以对象类型读入；未安装 pyarrow 时效果与整表读取相同
+
+        参数:
+            file_path: 文件路径
+            nrows: 要读取的行数（可选，用于测试）
+        返回:
+            pd.DataFrame: 读取的数据（未去重）
+        """
+        chunks = [
+            self._use_arrow_strings(chunk)
+            for chunk in pd.read_csv(file_path, nrows=nrows, chunksize=CSV_CHUNKSIZE)
+        ]
+        if not chunks:
+            # 没有任何数据行时只保留表头
+            return pd.read_csv(file_path, nrows=0)
+        return pd.concat(chunks, ignore_index=True)
+
+    def _read_excel(self, file_path: str, nrows: int = None) -> pd.DataFrame:
+        """
+        读取 Excel 文件，优先使用基于 Rust 的 calamine 引擎
+
+        未安装 python-calamine 或 pandas 版本不支持该引擎时使用默认引擎（openpyxl）
+
+        参数:
+            file_path: Excel 文件路径
+            nrows: 要读取的行数（可选）
+        返回:
+            pd.DataFrame: 读取的数据
+        """
+        try:
+            import python_calamine  # noqa: F401
+        except ImportError:
+            return pd.read_excel(file_path, nrows=nrows)
+
+        try:
+            return pd.read_excel(file_path, nrows=nrows, engine='calamine')
+        except ValueError as e:
+            # pandas 2.2 之前的版本不认识 calamine 引擎
+            logger.warning("calamine 引擎不可用，使用默认引擎读取 Excel: %s", e)
+            return pd.read_excel(file_path, nrows=nrows)
+
+    def _use_arrow_strings(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        将文本列转换为 pyarrow 支持的字符串类型，减少内存占用并使用向量化的字符串操作
+
+        未安装 pyarrow 或 pandas 版本低于 1.3 时原样返回
+
+        参数:
+            df: 数据
+        返回:
+            pd.DataFrame: 文本列已转换的数据
+        """
+        if not _PANDAS_SUPPORTS_ARROW_STRINGS:
+            return df
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return df
+
+        for column in TEXT_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('string[pyarrow]')
+        return df
+
+    def _iter_excel(self, file_path: str, chunksize: int, nrows: int = None) -> Iterator[pd.DataFrame]:
+        """
+        分块读取 Excel 文件
+
+        首次读取时将 Excel 转换为同目录下的 Parquet 缓存，之后直接按批读取缓存；
+        源文件修改后缓存自动失效。未安装 pyarrow 时直接读取 Excel。
+
+        参数:
+            file_path: Excel 文件路径
+            chunksize: 每块的行数
+            nrows: 要读取的行数（可选）
+        返回:
+            Iterator[pd.DataFrame]: 数据块迭代器
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            pa = pq = None
+
+        cache_path = os.path.splitext(file_path)[0] + '.cache.parquet'
+        if pq is not None:
+            cache_fresh = (
+                os.path.exists(cache_path)
+                and os.path.getmtime(cache_path) >= os.path.getmtime(file_path)
+            )
+            if not cache_fresh:
+                df = self._read_excel(file_path)
+                try:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    pq.write_table(table, cache_path, compression='zstd', row_group_size=50_000)
+                    logger.info("已生成 Parquet 缓存: %s", cache_path)
+                except Exception as e:
+                    # 列类型混杂等原因无法转换时，退回直接使用 Excel 数据
+                    logger.warning("生成 Parquet 缓存失败，直接使用 Excel 数据: %s", e)
+                    if nrows is not None:
+                        df = df.iloc[:nrows]
+                    for start in range(0, len(df), chunksize):
+                        yield df.iloc[start:start + chunksize]
+                    return
+
+            remaining = nrows
+            parquet_file = pq.ParquetFile(cache_path, memory_map=True)
+            for batch in parquet_file.iter_batches(batch_size=chunksize, use_threads=True):
+                chunk = batch.to_pandas()
+                if remaining is not None:
+                    chunk = chunk.iloc[:remaining]
+                    remaining -= len(chunk)
+                yield chunk
+                if remaining is not None and remaining <= 0:
+                    break
+            return
+
+        df = self._read_excel(file_path, nrows=nrows)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
     def preprocess_text(self, text: str) -> str:
         """
         预处理文本
@@ -98,21 +345,22 @@ class DataProcessor:
         text = text.lower()
 
         # 修正常见拼写错误
-        for wrong, correct in self.spelling_corrections.items():
-            text = re.sub(r'\b' + wrong + r'\b', correct, text)
+        text = self._spelling_pattern.sub(lambda m: self.spelling_corrections[m.group(1)], text)
 
         # 去除URL
-        text = re.sub(r'http\S+|www.\S+', '', text)
+        text = self._url_pattern.sub('', text)
 
         # 去除邮箱
-        text = re.sub(r'\S+@\S+', '', text)
+        text = self._email_pattern.sub('', text)
 
         # 去除多余的空白字符
-        text = re.sub(r'\s+', ' ', text)
+        text = self._whitespace_pattern.sub(' ', text)
 
-        # 去除不需要的标点符号
-        text = ''.join(char for char in text if char.isalnum() or
-                      char.isspace() or char in self.keep_punctuation)
+        # 去除不需要的标点符号（英文评论大多为纯 ASCII，按字节删除，其余文本仍用正则）
+        if text.isascii():
+            text = text.encode('ascii').translate(None, self._ascii_unwanted_bytes).decode('ascii')
+        else:
+            text = self._unwanted_char_pattern.sub('', text)
 
         return text.strip()
 
@@ -120,37 +368,79 @@ class DataProcessor:
         """
         处理整个DataFrame
 
+        清洗、基础特征、情感分数和关键词在同一次遍历中完成，每条评论只经 spaCy 解析一次
+
         参数:
             df: 原始DataFrame
         返回:
             pd.DataFrame: 处理后的DataFrame
         """
         from tqdm.auto import tqdm
-        tqdm.pandas()  # 初始化 tqdm 的 pandas 支持
 
         # 创建副本以避免修改原始数据
         processed_df = df.copy()
 
-        # 处理内容
-        processed_df['内容'] = processed_df['内容'].progress_apply(self.preprocess_text)
+        # 清洗后的文本直接送入 nlp.pipe，Doc 文本即清洗结果
+        logger.info("清洗文本并提取特征...")
+        cleaned = (self.preprocess_text(text) for text in processed_df['内容'])
+        docs = self.nlp.pipe(
+            cleaned, batch_size=self.nlp_batch_size, n_process=self._n_process(len(processed_df))
+        )
+        features = [self._doc_features(doc) for doc in tqdm(docs, total=len(processed_df))]
+
+        texts, lengths, word_counts, scores, keywords = (
+            map(list, zip(*features)) if features else ([], [], [], [], [])
+        )
+        processed_df['内容'] = texts
+
+        # 添加额外的特征、基础情感分数和关键词
+        processed_df['评论长度'] = lengths
+        processed_df['词数'] = word_counts
+        processed_df['情感分数'] = scores
+        processed_df['关键词'] = keywords
 
         # 删除内容为空的行
         processed_df = processed_df.dropna(subset=['内容'])
 
-        # 添加额外的特征
-        print("计算基础特征...")
-        processed_df['评论长度'] = processed_df['内容'].str.len()
-        processed_df['词数'] = processed_df['内容'].str.split().str.len()
+        return processed_df
 
-        # 添加基础情感分数
-        print("分析情感倾向...")
-        processed_df['情感分数'] = processed_df['内容'].progress_apply(self._get_sentiment_score)
+    def _n_process(self, n_texts: int) -> int:
+        """
+        根据文本数量选择 spaCy 的进程数
 
-        # 提取关键词
-        print("提取关键词...")
-        processed_df['关键词'] = processed_df['内容'].progress_apply(self._extract_keywords)
+        Windows 等使用 spawn 启动子进程的平台上，调用方必须位于 if __name__ == '__main__' 保护之下。
 
-        return processed_df
+        参数:
+            n_texts: 待处理文本数量
+        返回:
+            int: 进程数
+        """
+        if not self.parallel or n_texts < self.nlp_multiprocess_threshold:
+            return 1
+        if use_gpu():
+            # GPU 上运行时由单个进程独占设备
+            return 1
+        if multiprocessing.parent_process() is not None:
+            return 1
+        return max(1, min((os.cpu_count() or 1) - 1, 8))
+
+    def _doc_features(self, doc) -> Tuple[str, int, int, float, List[str]]:
+        """
+        由清洗后文本的 Doc 一次计算所有逐条特征
+
+        参数:
+            doc: spaCy的Doc对象
+        返回:
+            Tuple[str, int, int, float, List[str]]: (清洗后的文本, 评论长度, 词数, 情感分数, 关键词列表)
+        """
+        text = doc.text
+        return (
+            text,
+            len(text),
+            len(text.split()),
+            self._get_sentiment_score(text),
+            self._keywords_from_doc(doc)
+        )
 
     def _get_sentiment_score(self, text: str) -> float:
         """
@@ -162,7 +452,7 @@ class DataProcessor:
             float: 情感分数 (-1到1之间)
         """
         try:
-            return TextBlob(text).sentiment.polarity
+            return _text_polarity(text)
         except:
             return 0.0
 
@@ -176,22 +466,54 @@ class DataProcessor:
         返回:
             List[str]: 关键词列表
         """
-        doc = self.nlp(text)
+        return self._keywords_from_doc(self.nlp(text), max_keywords)
 
-        # 提取名词和形容词短语
+    def _extract_keywords_batch(self, texts: pd.Series, max_keywords: int = 5) -> List[List[str]]:
+        """
+        批量提取关键词，使用 nlp.pipe 分批解析，结果与逐条调用 _extract_keywords 一致
+
+        参数:
+            texts: 文本序列
+            max_keywords: 每条文本的最大关键词数量
+        返回:
+            List[List[str]]: 与输入顺序一致的关键词列表
+        """
+        from tqdm.auto import tqdm
+
+        docs = self.nlp.pipe(texts, batch_size=self.nlp_batch_size)
+        return [
+            self._keywords_from_doc(doc, max_keywords)
+            for doc in tqdm(docs, total=len(texts))
+        ]
+
+    def _keywords_from_doc(self, doc, max_keywords: int = 5) -> List[str]:
+        """
+        从已解析的 Doc 中提取关键词
+
+        参数:
+            doc: spaCy的Doc对象
+            max_keywords: 最大关键词数量
+        返回:
+            List[str]: 关键词列表
+        """
+        # 名词短语由 noun_chunks 一次给出，不再为每个名词/形容词重复遍历相互重叠的依存子树
         keywords = []
+        covered = set()
+        for chunk in doc.noun_chunks:
+            covered.update(range(chunk.start, chunk.end))
+            if chunk.root.text in self.stop_words:
+                continue
+            phrase = ' '.join(t.text for t in chunk if not t.is_stop and not t.is_punct)
+            if phrase:
+                keywords.append(phrase)
+
+        # 不在名词短语中的形容词（如表语形容词）单独作为关键词
         for token in doc:
-            if token.pos_ in {'NOUN', 'ADJ'} and token.text not in self.stop_words:
-                # 获取完整的短语
-                phrase = ' '.join([t.text for t in token.subtree
-                                 if not t.is_stop and not t.is_punct])
-                if phrase:
-                    keywords.append(phrase)
+            if token.pos_ == 'ADJ' and token.i not in covered and token.text not in self.stop_words:
+                keywords.append(token.text)
 
-        # 去重并限制数量
-        keywords = list(set(keywords))[:max_keywords]
-
-        return keywords
+        # 去重（保持出现顺序）并限制数量
+        return list(dict.fromkeys(keywords))[:max_keywords]
 
     def generate_summary_stats(self, df: pd.DataFrame) -> Dict:
         """
@@ -202,14 +524,18 @@ class DataProcessor:
         返回:
             Dict: 统计信息
         """
+        # sign 取值 -1/0/1，偏移后一次 bincount 得到三类计数，不再分别构造三个布尔掩码筛选 DataFrame
+        scores = df['情感分数'].dropna().to_numpy(dtype=np.float64)
+        sentiment_counts = np.bincount(np.sign(scores).astype(np.int64) + 1, minlength=3)
+
         stats = {
             '评论总数': len(df),
             '平均评论长度': df['评论长度'].mean(),
             '平均词数': df['词数'].mean(),
             '情感分布': {
-                '正面': len(df[df['情感分数'] > 0]),
-                '中性': len(df[df['情感分数'] == 0]),
-                '负面': len(df[df['情感分数'] < 0])
+                '正面': int(sentiment_counts[2]),
+                '中性': int(sentiment_counts[1]),
+                '负面': int(sentiment_counts[0])
             },
             '最常见关键词': self._get_top_keywords(df['关键词'])
         }
@@ -226,13 +552,10 @@ class DataProcessor:
         返回:
             Dict[str, int]: {关键词: 出现次数}
         """
-        # 展平所有关键词列表
-        all_keywords = [keyword for keywords in keywords_series for keyword in keywords]
-
-        # 统计频率
-        keyword_freq = pd.Series(all_keywords).value_counts()
+        # 直接对展平的关键词计数，不再构造中间列表和 Series；most_common 只选出前 top_n 个
+        keyword_freq = Counter(chain.from_iterable(keywords_series.dropna()))
 
-        return keyword_freq.head(top_n).to_dict()
+        return dict(keyword_freq.most_common(top_n))
 """
 数据加载和验证：
 读取Excel文件
@@ -3,9 +3,10 @@
 功能：生成分析报告，包括文本报告和Excel报表
 """
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import os
 from datetime import datetime
+from itertools import islice
 
 
 class ReportGenerator:
@@ -16,190 +17,181 @@ class ReportGenerator:
 
     def generate_text_report(self, analysis_results: Dict) -> str:
         """生成文本格式的分析报告"""
-        report = []
+        return '\n'.join(self._iter_report_lines(analysis_results))
+
+    @staticmethod
+    def _iter_section(
+            items: Dict,
+            detail_key: str,
+            detail_template: str,
+            bullets: Tuple[Tuple[str, str, Optional[int]], ...]
+        ) -> Iterator[str]:
+        """
+        逐行产出一个分析维度下各类别的报告内容
+
+        参数:
+            items: {类别: 类别数据}
+            detail_key: 提及次数之后一行所用指标的键名
+            detail_template: 该指标的格式模板
+            bullets: ((数据键名, 小标题, 最多条数), ...)，最多条数为 None 时全部列出
+        返回:
+            Iterator[str]: 报告行
+        """
+        for name, data in items.items():
+            yield f"\n{name.upper()}:"
+            yield f"提及次数: {data.get('mention_count', 0)}"
+            yield detail_template.format(data.get(detail_key, 0))
+            for key, label, limit in bullets:
+                if key in data:
+                    yield f"{label}:"
+                    for item in islice(data[key], limit):
+                        yield f"- {item}"
+
+    def _iter_report_lines(self, analysis_results: Dict) -> Iterator[str]:
+        """
+        逐行产出文本报告（可直接写入文件，无需先拼接成完整字符串）
 
+        参数:
+            analysis_results: 分析结果
+        返回:
+            Iterator[str]: 报告行
+        """
         # 1. 基础信息
-        report.append("=== 亚马逊评论分析报告 ===")
-        report.append("\n1. 基础信息:")
+        yield "=== 亚马逊评论分析报告 ==="
+        yield "\n1. 基础信息:"
         metadata = analysis_results.get('metadata', {})
-        report.append(f"总评论数: {metadata.get('total_reviews', 0)}")
-        report.append(f"分析时间: {metadata.get('timestamp', '')}")
-        report.append(f"分析可信度: {metadata.get('confidence_score', 0):.2f}")
+        yield f"总评论数: {metadata.get('total_reviews', 0)}"
+        yield f"分析时间: {metadata.get('timestamp', '')}"
+        yield f"分析可信度: {metadata.get('confidence_score', 0):.2f}"
 
         # 2. 用户维度分析
-        report.append("\n2. 用户维度分析:")
+        yield "\n2. 用户维度分析:"
 
         # 2.1 用户特征
-        report.append("\n2.1 用户特征:")
-        user_features = analysis_results.get('user_features', {})
-        for feature, data in user_features.items():
-            report.append(f"\n{feature.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"占比: {data.get('percentage', 0)}%")
-            if 'characteristics' in data:
-                report.append("主要特征:")
-                for char in data['characteristics']:
-                    report.append(f"- {char}")
-            if 'representative_comments' in data:
-                report.append("代表性评论:")
-                for comment in data['representative_comments'][:2]:
-                    report.append(f"- {comment}")
+        yield "\n2.1 用户特征:"
+        yield from self._iter_section(
+            analysis_results.get('user_features', {}), 'percentage', "占比: {}%",
+            (('characteristics', "主要特征", None), ('representative_comments', "代表性评论", 2))
+        )
 
         # 2.2 使用目的
-        report.append("\n2.2 使用目的:")
-        purposes = analysis_results.get('purposes', {})
-        for purpose, data in purposes.items():
-            report.append(f"\n{purpose.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"占比: {data.get('percentage', 0)}%")
-            if 'key_points' in data:
-                report.append("主要观点:")
-                for point in data['key_points']:
-                    report.append(f"- {point}")
+        yield "\n2.2 使用目的:"
+        yield from self._iter_section(
+            analysis_results.get('purposes', {}), 'percentage', "占比: {}%",
+            (('key_points', "主要观点", None),)
+        )
 
         # 2.3 使用场景
-        report.append("\n2.3 使用场景:")
-        scenarios = analysis_results.get('scenarios', {})
-        for scenario, data in scenarios.items():
-            report.append(f"\n{scenario.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"占比: {data.get('percentage', 0)}%")
-            if 'descriptions' in data:
-                report.append("场景描述:")
-                for desc in data['descriptions']:
-                    report.append(f"- {desc}")
+        yield "\n2.3 使用场景:"
+        yield from self._iter_section(
+            analysis_results.get('scenarios', {}), 'percentage', "占比: {}%",
+            (('descriptions', "场景描述", None),)
+        )
 
         # 3. 时空维度分析
-        report.append("\n3. 时空维度分析:")
+        yield "\n3. 时空维度分析:"
 
         # 3.1 使用时间
-        report.append("\n3.1 使用时间:")
-        timing = analysis_results.get('timing', {})
-        for time_type, data in timing.items():
-            report.append(f"\n{time_type.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"占比: {data.get('percentage', 0)}%")
-            if 'patterns' in data:
-                report.append("时间模式:")
-                for pattern in data['patterns']:
-                    report.append(f"- {pattern}")
+        yield "\n3.1 使用时间:"
+        yield from self._iter_section(
+            analysis_results.get('timing', {}), 'percentage', "占比: {}%",
+            (('patterns', "时间模式", None),)
+        )
 
         # 3.2 使用地点
-        report.append("\n3.2 使用地点:")
-        locations = analysis_results.get('locations', {})
-        for location, data in locations.items():
-            report.append(f"\n{location.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"占比: {data.get('percentage', 0)}%")
-            if 'characteristics' in data:
-                report.append("地点特征:")
-                for char in data['characteristics']:
-                    report.append(f"- {char}")
+        yield "\n3.2 使用地点:"
+        yield from self._iter_section(
+            analysis_results.get('locations', {}), 'percentage', "占比: {}%",
+            (('characteristics', "地点特征", None),)
+        )
 
         # 4. 产品维度分析
-        report.append("\n4. 产品维度分析:")
+        yield "\n4. 产品维度分析:"
 
         # 4.1 购买动机
-        report.append("\n4.1 购买动机:")
-        motivations = analysis_results.get('motivations', {})
-        for motivation, data in motivations.items():
-            report.append(f"\n{motivation.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"占比: {data.get('percentage', 0)}%")
-            if 'key_findings' in data:
-                report.append("主要发现:")
-                for finding in data['key_findings']:
-                    report.append(f"- {finding}")
+        yield "\n4.1 购买动机:"
+        yield from self._iter_section(
+            analysis_results.get('motivations', {}), 'percentage', "占比: {}%",
+            (('key_findings', "主要发现", None),)
+        )
 
         # 4.2 使用体验
-        report.append("\n4.2 使用体验:")
-        experiences = analysis_results.get('experiences', {})
-        for exp_type, data in experiences.items():
-            report.append(f"\n{exp_type.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"满意度: {data.get('satisfaction_score', 0):.2f}")
-            if 'key_feedback' in data:
-                report.append("主要反馈:")
-                for feedback in data['key_feedback']:
-                    report.append(f"- {feedback}")
+        yield "\n4.2 使用体验:"
+        yield from self._iter_section(
+            analysis_results.get('experiences', {}), 'satisfaction_score', "满意度: {:.2f}",
+            (('key_feedback', "主要反馈", None),)
+        )
 
         # 4.3 设计期望
-        report.append("\n4.3 设计期望:")
-        expectations = analysis_results.get('design_expectations', {})
-        for exp_type, data in expectations.items():
-            report.append(f"\n{exp_type.upper()}:")
-            report.append(f"提及次数: {data.get('mention_count', 0)}")
-            report.append(f"优先级: {data.get('priority', 0)}")
-            if 'suggestions' in data:
-                report.append("改进建议:")
-                for suggestion in data['suggestions']:
-                    report.append(f"- {suggestion}")
+        yield "\n4.3 设计期望:"
+        yield from self._iter_section(
+            analysis_results.get('design_expectations', {}), 'priority', "优先级: {}",
+            (('suggestions', "改进建议", None),)
+        )
 
         # 5. 情感分析
-        report.append("\n5. 情感分析:")
+        yield "\n5. 情感分析:"
         sentiment = analysis_results.get('sentiment', {})
 
         # 5.1 整体情感倾向
-        report.append("\n5.1 整体情感倾向:")
+        yield "\n5.1 整体情感倾向:"
         overall = sentiment.get('overall', {})
-        report.append(f"正面评价: {overall.get('positive', 0)}%")
-        report.append(f"中性评价: {overall.get('neutral', 0)}%")
-        report.append(f"负面评价: {overall.get('negative', 0)}%")
+        yield f"正面评价: {overall.get('positive', 0)}%"
+        yield f"中性评价: {overall.get('neutral', 0)}%"
+        yield f"负面评价: {overall.get('negative', 0)}%"
 
         # 5.2 各维度情感分布
-        report.append("\n5.2 各维度情感分布:")
+        yield "\n5.2 各维度情感分布:"
         dimensions = sentiment.get('dimensions', {})
         for dim, scores in dimensions.items():
-            report.append(f"\n{dim}:")
-            report.append(f"情感得分: {scores.get('score', 0):.2f}")
-            report.append(f"正面占比: {scores.get('positive', 0)}%")
-            report.append(f"负面占比: {scores.get('negative', 0)}%")
+            yield f"\n{dim}:"
+            yield f"情感得分: {scores.get('score', 0):.2f}"
+            yield f"正面占比: {scores.get('positive', 0)}%"
+            yield f"负面占比: {scores.get('negative', 0)}%"
 
         # 5.3 关键词情感分析
-        report.append("\n5.3 关键词情感分析:")
+        yield "\n5.3 关键词情感分析:"
         keywords = sentiment.get('keywords', {})
         for keyword, data in keywords.items():
-            report.append(f"\n{keyword}:")
-            report.append(f"情感倾向: {data.get('sentiment', '')}")
-            report.append(f"提及次数: {data.get('count', 0)}")
+            yield f"\n{keyword}:"
+            yield f"情感倾向: {data.get('sentiment', '')}"
+            yield f"提及次数: {data.get('count', 0)}"
 
         # 6. 改进建议
-        report.append("\n6. 改进建议:")
+        yield "\n6. 改进建议:"
         recommendations = analysis_results.get('recommendations', {})
 
         # 6.1 用户群体建议
-        report.append("\n6.1 用户群体建议:")
+        yield "\n6.1 用户群体建议:"
         for user_group, recs in recommendations.get('user_groups', {}).items():
-            report.append(f"\n目标群体: {user_group}")
-            report.append(f"发现: {recs.get('finding', '')}")
-            report.append(f"建议: {recs.get('suggestion', '')}")
-            report.append(f"优先级: {recs.get('priority', '')}")
+            yield f"\n目标群体: {user_group}"
+            yield f"发现: {recs.get('finding', '')}"
+            yield f"建议: {recs.get('suggestion', '')}"
+            yield f"优先级: {recs.get('priority', '')}"
 
         # 6.2 产品功能建议
-        report.append("\n6.2 产品功能建议:")
+        yield "\n6.2 产品功能建议:"
         for feature, recs in recommendations.get('features', {}).items():
-            report.append(f"\n功能: {feature}")
-            report.append(f"问题: {recs.get('issue', '')}")
-            report.append(f"建议: {recs.get('suggestion', '')}")
-            report.append(f"优先级: {recs.get('priority', '')}")
+            yield f"\n功能: {feature}"
+            yield f"问题: {recs.get('issue', '')}"
+            yield f"建议: {recs.get('suggestion', '')}"
+            yield f"优先级: {recs.get('priority', '')}"
 
         # 6.3 设计改进建议
-        report.append("\n6.3 设计改进建议:")
+        yield "\n6.3 设计改进建议:"
         for design, recs in recommendations.get('design', {}).items():
-            report.append(f"\n设计方面: {design}")
-            report.append(f"现状: {recs.get('current_state', '')}")
-            report.append(f"建议: {recs.get('suggestion', '')}")
-            report.append(f"优先级: {recs.get('priority', '')}")
+            yield f"\n设计方面: {design}"
+            yield f"现状: {recs.get('current_state', '')}"
+            yield f"建议: {recs.get('suggestion', '')}"
+            yield f"优先级: {recs.get('priority', '')}"
 
         # 6.4 营销策略建议
-        report.append("\n6.4 营销策略建议:")
+        yield "\n6.4 营销策略建议:"
         for strategy, recs in recommendations.get('marketing', {}).items():
-            report.append(f"\n策略方向: {strategy}")
-            report.append(f"机会点: {recs.get('opportunity', '')}")
-            report.append(f"建议: {recs.get('suggestion', '')}")
-            report.append(f"预期效果: {recs.get('expected_impact', '')}")
-
-        return '\n'.join(report)
+            yield f"\n策略方向: {strategy}"
+            yield f"机会点: {recs.get('opportunity', '')}"
+            yield f"建议: {recs.get('suggestion', '')}"
+            yield f"预期效果: {recs.get('expected_impact', '')}"
 
     def generate_excel_report(
             self,
@@ -500,9 +492,6 @@ class ReportGenerator:
             'insights': insights
         }
 
-        # 生成文本报告
-        text_report = self.generate_text_report(full_results)
-
         # 保存文本报告
         if output_name is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -510,7 +499,8 @@ class ReportGenerator:
 
         text_path = os.path.join(self.output_dir, f'{output_name}.txt')
         with open(text_path, 'w', encoding='utf-8') as f:
-            f.write(text_report)
+            # 逐行写入，不先拼接成完整的报告字符串
+            f.writelines(line + '\n' for line in self._iter_report_lines(full_results))
 
         # 生成Excel报告
         excel_path = self.generate_excel_report(full_results, output_name)
@@ -0,0 +1,208 @@
+"""
+关键词匹配工具
+功能：将 {主类别: {子类别: {关键词集合}}} 形式的模式预编译为多模式匹配器，
+     一次扫描文本即可确定其所属类别
+"""
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Set
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick 为可选依赖，未安装时尝试使用 marisa-trie
+    ahocorasick = None
+
+try:
+    import marisa_trie
+except ImportError:  # marisa-trie 为可选依赖，两者都未安装时逐个关键词匹配
+    marisa_trie = None
+
+
+class KeywordMatcher:
+    def __init__(self, patterns: Dict[str, Dict[str, Set[str]]], cache_size: int = 8192):
+        """
+        初始化关键词匹配器
+
+        参数:
+            patterns: {主类别: {子类别: {关键词集合}}}
+            cache_size: 匹配结果缓存的条目数（同一短语在评论中反复出现）
+        """
+        self.patterns = patterns
+
+        # 按文本缓存匹配到的类别序号，重复出现的短语直接命中缓存
+        self.match_id = lru_cache(maxsize=cache_size)(self._match_id)
+
+        # 类别标签按模式定义顺序排列，顺序即匹配优先级
+        self.labels = [
+            f"{main_category}_{sub_category}"
+            for main_category, subcategories in patterns.items()
+            for sub_category in subcategories
+        ]
+
+        # 展平为 [(关键词, 类别)] 列表，按类别优先级排列，用于确定各关键词的优先级
+        self._flat_patterns = [
+            (keyword, label)
+            for label, keywords in zip(
+                self.labels,
+                (keywords for subcategories in patterns.values() for keywords in subcategories.values())
+            )
+            for keyword in keywords
+            if keyword
+        ]
+
+        # 每个关键词对应其所属类别中优先级最高（序号最小）的类别
+        self._keyword_priority = {}
+        label_priority = {label: i for i, label in reversed(list(enumerate(self.labels)))}
+        for keyword, label in self._flat_patterns:
+            self._keyword_priority.setdefault(keyword, label_priority[label])
+
+        # 每个关键词取按空格拆分后最长的片段；由完整 Token 以空格拼接成的短语若包含某个关键词，
+        # 则该关键词的每个片段都落在单个 Token 内，因此原句中必然包含这个片段
+        self._fragments = frozenset(
+            max(keyword.split(), key=len)
+            for keyword in self._keyword_priority
+            if keyword.strip()
+        )
+        self._fragment_automaton = None
+        self._fragment_pattern = None
+
+        # 优先使用 Aho-Corasick 自动机，其次使用 MARISA 前缀树；都不可用或没有关键词时逐个关键词匹配
+        self._automaton = None
+        self._trie = None
+        self._category_regexes = []
+        if self._keyword_priority:
+            if ahocorasick is not None:
+                self._automaton = self._build_automaton()
+                self._fragment_automaton = ahocorasick.Automaton()
+                for fragment in self._fragments:
+                    self._fragment_automaton.add_word(fragment, fragment)
+                self._fragment_automaton.make_automaton()
+            else:
+                if marisa_trie is not None:
+                    self._trie = marisa_trie.Trie(self._keyword_priority)
+                else:
+                    # 每个类别预编译一个关键词正则，按优先级依次搜索，由正则引擎代替逐个关键词的子串查找
+                    self._category_regexes = [
+                        (category_id, re.compile('|'.join(map(re.escape, sorted(keywords, key=len, reverse=True)))))
+                        for category_id, keywords in enumerate(
+                            {keyword for keyword in keywords if keyword}
+                            for subcategories in patterns.values()
+                            for keywords in subcategories.values()
+                        )
+                        if keywords
+                    ]
+                # 使用前瞻匹配，finditer 可得到所有（包括相互重叠的）片段起始位置
+                self._fragment_pattern = re.compile(
+                    '(?=' + '|'.join(map(re.escape, sorted(self._fragments, key=len, reverse=True))) + ')'
+                )
+
+    def _build_automaton(self):
+        """
+        构建 Aho-Corasick 自动机，值为关键词对应的类别序号
+
+        返回:
+            ahocorasick.Automaton: 自动机
+        """
+        automaton = ahocorasick.Automaton()
+        for keyword, priority in self._keyword_priority.items():
+            automaton.add_word(keyword, priority)
+        automaton.make_automaton()
+        return automaton
+
+    def could_match(self, text: str) -> bool:
+        """
+        快速判断由该文本中的 Token 组成的短语是否可能匹配到任何类别
+
+        参数:
+            text: 句子等较长文本（大小写需与关键词一致）
+        返回:
+            bool: 文本不包含任何关键词片段时返回 False，此时其中的短语都不会匹配
+        """
+        if self._fragment_automaton is not None:
+            for _ in self._fragment_automaton.iter(text):
+                return True
+            return False
+        if self._fragment_pattern is not None:
+            return self._fragment_pattern.search(text) is not None
+        return False
+
+    def fragment_starts(self, text: str) -> List[int]:
+        """
+        一次扫描找出文本中所有关键词片段的起始位置
+
+        参数:
+            text: 整篇评论等较长文本（大小写需与关键词一致）
+        返回:
+            List[int]: 按升序排列的片段起始字符位置
+        """
+        if self._fragment_automaton is not None:
+            return sorted({end - len(fragment) + 1 for end, fragment in self._fragment_automaton.iter(text)})
+        if self._fragment_pattern is not None:
+            return [m.start() for m in self._fragment_pattern.finditer(text)]
+        return []
+
+    def candidate_sents(self, doc) -> Iterator:
+        """
+        按整篇 Doc 一次扫描得到的片段位置，依次返回可能包含匹配短语的句子
+
+        参数:
+            doc: spaCy的Doc对象
+        返回:
+            Iterator: 至少包含一个关键词片段起点的句子（Span）；Doc 中没有任何片段时不切分句子
+        """
+        starts = self.fragment_starts(doc.text)
+        if not starts:
+            return
+        for sent in doc.sents:
+            i = bisect_left(starts, sent.start_char)
+            if i < len(starts) and starts[i] < sent.end_char:
+                yield sent
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        确定文本所属的类别（文本中包含某类别任一关键词即视为属于该类别）
+
+        参数:
+            text: 待匹配的文本
+        返回:
+            Optional[str]: 优先级最高的匹配类别，格式为 "主类别_子类别"；无匹配时返回 None
+        """
+        category_id = self.match_id(text)
+        return self.labels[category_id] if category_id is not None else None
+
+    def _match_id(self, text: str) -> Optional[int]:
+        """
+        确定文本所属类别的序号（不经过缓存，经缓存的版本为 self.match_id）
+
+        参数:
+            text: 待匹配的文本
+        返回:
+            Optional[int]: 优先级最高的匹配类别在 labels 中的序号；无匹配时返回 None
+        """
+        if self._automaton is not None:
+            best = None
+            for _, priority in self._automaton.iter(text):
+                if best is None or priority < best:
+                    best = priority
+                    if best == 0:
+                        break
+            return best
+
+        if self._trie is not None:
+            # 在每个起始位置查找以该位置开头的关键词
+            best = None
+            for start in range(len(text)):
+                for keyword in self._trie.prefixes(text[start:]):
+                    priority = self._keyword_priority[keyword]
+                    if best is None or priority < best:
+                        best = priority
+                if best == 0:
+                    break
+            return best
+
+        # 按类别优先级依次搜索，第一个命中的类别即优先级最高的类别
+        for category_id, regex in self._category_regexes:
+            if regex.search(text):
+                return category_id
+        return None
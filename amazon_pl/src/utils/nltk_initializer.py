@@ -4,11 +4,31 @@ import logging
 import time
 from pathlib import Path
 import ssl
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
 import os
 
 logger = logging.getLogger(__name__)
 
+# 优先在 NLTK_DATA 指定的目录中查找资源，减少目录遍历
+if os.environ.get('NLTK_DATA') and os.environ['NLTK_DATA'] not in nltk.data.path:
+    nltk.data.path.insert(0, os.environ['NLTK_DATA'])
+
+# 所需资源及其在 NLTK 数据目录中的路径
+NLTK_RESOURCE_PATHS = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger'
+}
+
+# 资源检查是否已完成（每个进程只检查一次）
+_NLTK_READY = False
+
+# 后台初始化任务及其所属进程（子进程中不等待父进程的任务）
+_init_future: Optional[Future] = None
+_init_pid: Optional[int] = None
+
 def initialize_nltk_resources(max_retries: int = 3, retry_delay: int = 2):
     """
     初始化NLTK资源，包含重试机制和离线备份
@@ -17,13 +37,10 @@ def initialize_nltk_resources(max_retries: int = 3, retry_delay: int = 2):
         max_retries: 最大重试次数
         retry_delay: 重试间隔（秒）
     """
+    global _NLTK_READY
+
     # 需要下载的资源列表
-    required_resources = [
-        'punkt',
-        'stopwords',
-        'wordnet',
-        'averaged_perceptron_tagger'
-    ]
+    required_resources = list(NLTK_RESOURCE_PATHS)
 
     # 设置NLTK数据目录
     nltk_data_dir = Path(os.path.expanduser('~/nltk_data'))
@@ -43,7 +60,7 @@ def initialize_nltk_resources(max_retries: int = 3, retry_delay: int = 2):
             try:
                 # 检查资源是否已存在
                 try:
-                    nltk.data.find(f'tokenizers/{resource}')
+                    nltk.data.find(NLTK_RESOURCE_PATHS[resource])
                     logger.info(f"Resource {resource} already exists")
                     break
                 except LookupError:
@@ -63,6 +80,24 @@ def initialize_nltk_resources(max_retries: int = 3, retry_delay: int = 2):
                     logger.warning(f"Attempt {retries} failed, retrying in {retry_delay} seconds...")
                     time.sleep(retry_delay)
 
+    _NLTK_READY = True
+
+def ensure_nltk_resources():
+    """确保所需NLTK资源可用，每个进程只检查一次，缺失的资源直接下载"""
+    global _NLTK_READY
+
+    if _NLTK_READY:
+        return
+
+    for resource, path in NLTK_RESOURCE_PATHS.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            logger.info(f"Downloading {resource}...")
+            nltk.download(resource, quiet=True)
+
+    _NLTK_READY = True
+
 def try_offline_backup(resource: str):
     """
     尝试使用离线备份资源
@@ -87,4 +122,54 @@ def try_offline_backup(resource: str):
         else:
             logger.error(f"No backup found for {resource}")
     else:
-        logger.error("Backup directory not found")
\ No newline at end of file
+        logger.error("Backup directory not found")
+
+def _initialize_and_prewarm(max_retries: int, retry_delay: int):
+    """
+    初始化NLTK资源并预加载懒加载的语料库
+
+    参数:
+        max_retries: 最大重试次数
+        retry_delay: 重试间隔（秒）
+    """
+    initialize_nltk_resources(max_retries=max_retries, retry_delay=retry_delay)
+
+    # 语料库在首次访问时才真正加载，这里提前触发
+    try:
+        from nltk.corpus import stopwords, wordnet
+        stopwords.words('english')
+        wordnet.ensure_loaded()
+    except (LookupError, OSError) as e:
+        logger.warning(f"Failed to prewarm NLTK corpora: {str(e)}")
+
+
+def start_nltk_initialization(max_retries: int = 3, retry_delay: int = 2) -> Future:
+    """
+    在后台线程中初始化NLTK资源，使其与配置加载、分析器构建并行进行
+
+    参数:
+        max_retries: 最大重试次数
+        retry_delay: 重试间隔（秒）
+    返回:
+        Future: 初始化任务
+    """
+    global _init_future, _init_pid
+
+    if _init_future is None or _init_pid != os.getpid():
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nltk-init')
+        _init_future = executor.submit(_initialize_and_prewarm, max_retries, retry_delay)
+        _init_pid = os.getpid()
+        executor.shutdown(wait=False)
+
+    return _init_future
+
+
+def wait_for_nltk_resources():
+    """等待后台NLTK初始化完成（未启动后台初始化时直接返回，可重复调用）"""
+    if _init_future is None or _init_pid != os.getpid():
+        return
+
+    try:
+        _init_future.result()
+    except Exception as e:
+        logger.error(f"NLTK initialization failed: {str(e)}")
@@ -2,13 +2,45 @@
 情感分析工具
 功能：提供文本情感分析功能，包括细粒度情感分类、关键词提取和置信度评分
 """
-from textblob import TextBlob
+import numpy as np
+from textblob.en.sentiments import PatternAnalyzer
 from typing import Dict, List, Tuple
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import sentiwordnet as swn
 import re
 import logging
+from functools import lru_cache
+
+
+# TextBlob 默认使用的情感分析器；复用同一个实例，不再为每条文本创建 TextBlob 对象
+_PATTERN_ANALYZER = PatternAnalyzer()
+
+
+@lru_cache(maxsize=50_000)
+def _text_sentiment(text: str) -> Tuple[float, float]:
+    """
+    计算文本的 TextBlob 情感极性和主观性（进程内按文本缓存，各分析器共享）
+
+    参数:
+        text: 待分析文本
+    返回:
+        Tuple[float, float]: (情感极性 -1到1, 主观性 0到1)
+    """
+    polarity, subjectivity = _PATTERN_ANALYZER.analyze(text)
+    return polarity, subjectivity
+
+
+def _text_polarity(text: str) -> float:
+    """
+    计算文本的 TextBlob 情感极性（经 _text_sentiment 缓存）
+
+    参数:
+        text: 待分析文本
+    返回:
+        float: 情感极性 (-1到1)
+    """
+    return _text_sentiment(text)[0]
 
 class SentimentAnalysisError(Exception):
     """情感分析错误"""
@@ -65,9 +97,8 @@ class SentimentAnalyzer:
             }
         """
         try:
-            blob = TextBlob(str(text))
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
+            # 复用共享的 PatternAnalyzer，并按文本缓存（重复的评论内容只分析一次）
+            polarity, subjectivity = _text_sentiment(str(text))
 
             # 获取详细情感标签和置信度
             label, confidence = self._get_detailed_sentiment(polarity, subjectivity)
@@ -86,6 +117,17 @@ class SentimentAnalyzer:
             self.logger.error(f"Sentiment analysis failed: {str(e)}")
             raise SentimentAnalysisError(f"Failed to analyze sentiment: {str(e)}")
 
+    def polarity(self, text: str) -> float:
+        """
+        只计算文本的情感极性（不提取情感词，适合批量计算）
+
+        参数:
+            text: 待分析文本
+        返回:
+            float: 情感极性 (-1到1)
+        """
+        return _text_polarity(str(text))
+
     def _get_detailed_sentiment(
             self,
             polarity: float,
@@ -194,11 +236,11 @@ class SentimentAnalyzer:
             if not texts:
                 raise ValueError("Empty text list provided")
 
+            # 趋势只需要极性：直接取缓存的极性，不再为每条文本提取情感词
             sentiment_scores = []
             for text in texts:
                 try:
-                    score = self.analyze_sentiment(text)['polarity']
-                    sentiment_scores.append(score)
+                    sentiment_scores.append(self.polarity(text))
                 except Exception as e:
                     self.logger.warning(f"Error analyzing text: {str(e)}")
                     continue
@@ -206,17 +248,18 @@ class SentimentAnalyzer:
             if not sentiment_scores:
                 raise SentimentAnalysisError("No valid sentiment scores generated")
 
+            scores = np.asarray(sentiment_scores, dtype=np.float64)
+
             # 计算平均情感分数
-            avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
+            avg_sentiment = float(scores.mean())
 
             # 计算情感波动性（标准差）
-            volatility = (sum((s - avg_sentiment) ** 2 for s in sentiment_scores)
-                          / len(sentiment_scores)) ** 0.5
+            volatility = float(scores.std())
 
             # 确定趋势
-            if len(sentiment_scores) > 1:
-                start_avg = sum(sentiment_scores[:3]) / 3  # 前3个评论的平均
-                end_avg = sum(sentiment_scores[-3:]) / 3  # 后3个评论的平均
+            if scores.size > 1:
+                start_avg = scores[:3].sum() / 3  # 前3个评论的平均
+                end_avg = scores[-3:].sum() / 3  # 后3个评论的平均
 
                 if end_avg - start_avg > 0.2:
                     trend = 'improving'
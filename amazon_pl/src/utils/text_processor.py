@@ -13,6 +13,9 @@ from collections import Counter
 import string
 import emoji
 
+# 删除全部 ASCII 标点的转换表（只构建一次）
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
 class TextProcessor:
     def __init__(self):
         """初始化文本处理器"""
@@ -88,7 +91,7 @@ class TextProcessor:
 
         # 删除标点符号
         if remove_punctuation:
-            text = text.translate(str.maketrans('', '', string.punctuation))
+            text = text.translate(_PUNCTUATION_TABLE)
 
         # 转换为小写
         if lowercase:
@@ -192,10 +195,11 @@ class TextProcessor:
                 if self.lemmatizer.lemmatize(token.lower()) in lemmatized_keywords
             ]
         else:
-            # 直接匹配原形
+            # 直接匹配原形（关键词只转换一次小写，不在每个词上重复构建集合）
+            lowered_keywords = frozenset(k.lower() for k in keywords)
             matched = [
                 token for token in tokens
-                if token.lower() in {k.lower() for k in keywords}
+                if token.lower() in lowered_keywords
             ]
 
         return matched
@@ -0,0 +1,33 @@
+"""
+分析器模块导入测试
+功能：确保每个分析器模块都能正常导入（例如 spacy.symbols 中不存在的标签会在导入时报错）
+"""
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+# 与 main.py 一致，以 amazon_pl 目录为根导入 src 包
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+ANALYZER_MODULES = [
+    'src.analyzers.base_analyzer',
+    'src.analyzers.design_expectation_analyzer',
+    'src.analyzers.experience_analyzer',
+    'src.analyzers.location_analyzer',
+    'src.analyzers.motivation_analyzer',
+    'src.analyzers.purpose_analyzer',
+    'src.analyzers.scenario_analyzer',
+    'src.analyzers.timing_analyzer',
+    'src.analyzers.user_analyzer',
+]
+
+
+@pytest.mark.parametrize('module_name', ANALYZER_MODULES)
+def test_analyzer_module_imports(module_name):
+    """每个分析器模块都能导入（未安装依赖时跳过）"""
+    for dependency in ('spacy', 'pandas', 'numpy', 'nltk', 'textblob', 'emoji'):
+        pytest.importorskip(dependency)
+
+    importlib.import_module(module_name)
@@ -0,0 +1,49 @@
+"""
+日志配置测试
+功能：确保经队列输出的日志每行只套用一次日志格式
+"""
+import atexit
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+# 与 main.py 一致，以 amazon_pl 目录为根导入
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def test_log_line_formatted_once(tmp_path, monkeypatch):
+    """一条日志在日志文件中只出现一次级别和记录器名称"""
+    for dependency in ('yaml', 'spacy', 'pandas', 'numpy', 'nltk', 'textblob', 'emoji'):
+        pytest.importorskip(dependency)
+    import main
+
+    monkeypatch.chdir(tmp_path)
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    for handler in saved_handlers:
+        root.removeHandler(handler)
+
+    try:
+        listener = main._setup_logging()
+        assert listener is not None
+
+        logging.getLogger('format_check').info("hello %s", 'world')
+
+        # 停止监听器会先处理完队列中的全部记录
+        listener.stop()
+        atexit.unregister(listener.stop)
+        for handler in listener.handlers:
+            handler.close()
+
+        lines = (tmp_path / 'logs' / 'analysis.log').read_text(encoding='utf-8').splitlines()
+        line = next(line for line in lines if 'hello world' in line)
+        assert line.endswith(' - format_check - INFO - hello world')
+        assert line.count('INFO') == 1
+    finally:
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)